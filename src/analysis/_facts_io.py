@@ -0,0 +1,87 @@
+import functools
+import operator
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+FACT_DTYPES = {
+    "nb_interventions": "int32",
+    "dispatch_time": "float32",
+    "travel_time": "float32",
+    "response_time": "float32",
+}
+
+def downcast_facts(df):
+    """
+    Casts the wide numeric fact columns to 32-bit types.
+    
+    Parameters:
+        df (pd.DataFrame): Fact table as read from parquet.
+        
+    Returns:
+        pd.DataFrame: The same columns, with those listed in FACT_DTYPES downcast.
+    """
+    dtypes = {c: t for c, t in FACT_DTYPES.items() if c in df.columns}
+    return df.astype(dtypes)
+
+def get_facts(path, columns):
+    """
+    Reads the requested columns of a fact table.
+    
+    Parameters:
+        path (Path): Parquet file to read.
+        columns (list): Columns to project at read time.
+        
+    Returns:
+        pd.DataFrame: The requested columns of the fact table, downcast per FACT_DTYPES.
+    """
+    df = pd.read_parquet(path, columns=list(columns), engine="pyarrow", use_threads=True, memory_map=True)
+    return downcast_facts(df)
+
+def read_facts_where(path, columns, filter, categories=None):
+    """
+    Reads a fact table with a row filter pushed down to the Parquet scan.
+    
+    Row groups whose statistics cannot match are skipped, and filtered rows never reach pandas.
+    
+    Parameters:
+        path (Path): Parquet file to read.
+        columns (list): Columns to project at read time.
+        filter (pyarrow.compute.Expression): Row predicate built from pyarrow.dataset.field.
+        categories (list, optional): String columns to decode as pandas categoricals.
+        
+    Returns:
+        pd.DataFrame: The matching rows of the requested columns, downcast per FACT_DTYPES.
+    """
+    table = ds.dataset(path, format="parquet").to_table(columns=list(columns), filter=filter)
+    return downcast_facts(table.to_pandas(categories=categories, self_destruct=True))
+
+def aggregate_facts(path, keys, measures):
+    """
+    Sums fact measures per key while streaming record batches, without materializing rows in pandas.
+    
+    Each batch is reduced with Arrow's hash aggregation and the partial sums are combined once 
+    at the end, so memory stays proportional to the number of groups. Rows with a null key 
+    are dropped, like a pandas groupby.
+    
+    Parameters:
+        path (Path): Parquet file to read.
+        keys (list): Group-by columns.
+        measures (dict): Output column name -> pyarrow.dataset expression to sum.
+        
+    Returns:
+        pd.DataFrame: One row per key combination with one summed column per measure.
+    """
+    key_filter = functools.reduce(operator.and_, [ds.field(k).is_valid() for k in keys])
+    scanner = ds.dataset(path, format="parquet").scanner(
+        columns={**{k: ds.field(k) for k in keys}, **measures}, filter=key_filter
+    )
+    
+    sums = [(m, "sum") for m in measures]
+    partials = [pa.Table.from_batches([batch]).group_by(keys).aggregate(sums) for batch in scanner.to_batches()]
+    if not partials:
+        partials = [scanner.projected_schema.empty_table().group_by(keys).aggregate(sums)]
+    
+    totals = pa.concat_tables(partials).group_by(keys).aggregate([(f"{m}_sum", "sum") for m in measures])
+    return totals.rename_columns({f"{m}_sum_sum": m for m in measures}).to_pandas()
@@ -5,17 +5,29 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 import os
+import gc
+import hashlib
 from pathlib import Path
-from shapely.geometry import Point
+from concurrent.futures import ProcessPoolExecutor
+
+from _facts_io import get_facts
+import shapely
 from shapely.ops import voronoi_diagram
-from shapely.geometry import MultiPoint, box
+from shapely.geometry import box
+from shapely import STRtree
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 DATA_DIR = PROJECT_ROOT / "data" / "processed" / "galaxy_schema"
 GEO_DIR = PROJECT_ROOT / "geodata"
+SHAPE_PATH = GEO_DIR / "MODZCTA_2010_WGS1984.geo.json"
+CACHE_DIR = PROJECT_ROOT / "data" / "processed" / "analysis_cache"
 OUTPUT_FIG = PROJECT_ROOT / "output" / "figures" / "geographic"
 OUTPUT_REPORT = PROJECT_ROOT / "output" / "reports"
 
+MAP_SIMPLIFY_TOLERANCE = 1e-4
+PNG_PIL_KWARGS = {"compress_level": 1}
+VORONOI_CACHE_PREFIX = "Voronoi_Firehouse"
+
 OUTPUT_FIG.mkdir(parents=True, exist_ok=True)
 OUTPUT_REPORT.mkdir(parents=True, exist_ok=True)
 
@@ -25,64 +37,86 @@ def load_data():
     
     This function reads parquet files for location and firehouse dimensions, and EMS/Fire incident facts.
     It combines EMS and Fire facts into a single dataset. It also loads the NYC MODZCTA shapefile 
-    for geospatial plotting.
+    for geospatial plotting, with MODZCTA parsed to Int32 to match 'zipcode' and each MODZCTA centroid 
+    precomputed in a '_centroid' column and as plain '_cx'/'_cy' coordinates. Polygons are simplified 
+    once (about 10 m) for drawing; the outline used for clipping is dissolved from the original polygons 
+    and simplified afterwards, so shared edges cannot open gaps.
         
     Returns:
         tuple: A tuple containing:
-            - dim_location (pd.DataFrame): Location dimension data.
+            - dim_location (pd.DataFrame): Location dimension data, indexed by 'location_key'.
             - dim_firehouse (pd.DataFrame): Firehouse dimension data.
             - combined (pd.DataFrame): Combined EMS and Fire incident data.
             - nyc_map (gpd.GeoDataFrame): NYC MODZCTA shapefile data.
+            - nyc_outline (shapely.Geometry): Union of all MODZCTA polygons.
     """
     print("Loading data...")
-    dim_location = pd.read_parquet(DATA_DIR / "Dim_Location.parquet")
-    dim_firehouse = pd.read_parquet(DATA_DIR / "Dim_Firehouse.parquet")
+    dim_location = pd.read_parquet(DATA_DIR / "Dim_Location.parquet", columns=["location_key", "zipcode"], engine="pyarrow")
+    dim_location = dim_location.astype({"zipcode": "Int32"}).set_index("location_key")
+    dim_firehouse = pd.read_parquet(DATA_DIR / "Dim_Firehouse.parquet", columns=["Latitude", "Longitude"], engine="pyarrow")
     
     cols = ["location_key", "nb_interventions", "response_time"] 
-    f_ems = pd.read_parquet(DATA_DIR / "Fact_Incidents_EMS.parquet", columns=cols)
-    f_fire = pd.read_parquet(DATA_DIR / "Fact_Incidents_Fire.parquet", columns=cols)
-    combined = pd.concat([f_ems, f_fire])
+    f_ems = get_facts(DATA_DIR / "Fact_Incidents_EMS.parquet", cols)
+    f_fire = get_facts(DATA_DIR / "Fact_Incidents_Fire.parquet", cols)
+    combined = pd.concat([f_ems, f_fire], ignore_index=True)
+    
+    print(f"Loading Shapefile from {SHAPE_PATH}...")
+    nyc_map = gpd.read_file(SHAPE_PATH)
+    nyc_map["MODZCTA"] = pd.to_numeric(nyc_map["MODZCTA"], errors="coerce").astype("Int32")
+    centroids = shapely.centroid(nyc_map.geometry.values)
+    nyc_map["_centroid"] = gpd.GeoSeries(centroids, index=nyc_map.index, crs=nyc_map.crs)
+    nyc_map["_cx"] = shapely.get_x(centroids)
+    nyc_map["_cy"] = shapely.get_y(centroids)
+    nyc_outline = shapely.simplify(shapely.union_all(nyc_map.geometry.values), tolerance=MAP_SIMPLIFY_TOLERANCE, preserve_topology=True)
+    nyc_map["geometry"] = shapely.simplify(nyc_map.geometry.values, tolerance=MAP_SIMPLIFY_TOLERANCE, preserve_topology=True)
+    
+    return dim_location, dim_firehouse, combined, nyc_map, nyc_outline
+
+def build_zip_agg(combined, dim_location):
+    """
+    Aggregates incident volume and average response time per zipcode.
+    
+    Incidents are mapped to their zipcode through the location dimension and grouped 
+    in a single pass, so every analysis can share the same zipcode-level table.
+    The response time is weighted by 'nb_interventions' and only counts incidents 
+    that have a response time.
+    
+    Parameters:
+        combined (pd.DataFrame): Combined incident data.
+        dim_location (pd.DataFrame): Location dimension data indexed by 'location_key'.
+        
+    Returns:
+        pd.DataFrame: One row per zipcode with 'nb_interventions' and 'response_time'.
+    """
+    merged = combined.join(dim_location[["zipcode"]], on="location_key", how="inner")
     
-    shape_path = GEO_DIR / "MODZCTA_2010_WGS1984.geo.json"
-    print(f"Loading Shapefile from {shape_path}...")
-    nyc_map = gpd.read_file(shape_path)
+    rt = merged["response_time"].to_numpy(dtype=float, na_value=np.nan)
+    nb = merged["nb_interventions"].to_numpy(dtype=float)
+    has_rt = ~np.isnan(rt)
+    merged["rt_weighted"] = np.where(has_rt, rt * nb, 0.0)
+    merged["nb_timed"] = np.where(has_rt, nb, 0.0)
     
-    return dim_location, dim_firehouse, combined, nyc_map
+    sums = merged.groupby("zipcode", sort=False, observed=True)[["nb_interventions", "rt_weighted", "nb_timed"]].sum()
+    sums["response_time"] = sums["rt_weighted"] / sums["nb_timed"].replace(0, np.nan)
+    return sums[["nb_interventions", "response_time"]].reset_index()
 
-def analyze_speed_trap(combined, dim_location, nyc_map):
+def analyze_speed_trap(zip_agg, nyc_map):
     """
     Generates a map visualizing the relationship between response time and incident volume.
     
-    This method aggregates incident data by location key and then by zipcode to calculate
-    average response times and total intervention volumes. It merges this data with the 
-    NYC shapefile to produce a map where color represents response time and ring size 
-    represents volume.
+    This method uses the zipcode-level average response times and total intervention volumes.
+    It merges this data with the NYC shapefile to produce a map where color represents 
+    response time and ring size represents volume.
     
     Parameters:
-        combined (pd.DataFrame): Combined incident data.
-        dim_location (pd.DataFrame): Location dimension data.
+        zip_agg (pd.DataFrame): Zipcode-level volume and response time aggregates.
         nyc_map (gpd.GeoDataFrame): NYC shapefile data.
         
     Returns:
         None: Saves the generated figure 'speed_trap_map.png' to the output directory.
     """
     print("Running Speed Trap Analysis (Map)...")
-    
-    agg_loc = combined.groupby("location_key").agg({
-        "nb_interventions": "sum",
-        "response_time": "mean"
-    }).reset_index()
-    
-    merged = agg_loc.merge(dim_location, on="location_key")
-    
-    zip_agg = merged.groupby("zipcode").agg({
-        "nb_interventions": "sum",
-        "response_time": "mean"
-    }).reset_index()
 
-    nyc_map["MODZCTA"] = nyc_map["MODZCTA"].astype(str)
-    zip_agg["zipcode"] = zip_agg["zipcode"].astype(str)
-    
     map_data = nyc_map.merge(zip_agg, left_on="MODZCTA", right_on="zipcode", how="left")
     fig, ax = plt.subplots(figsize=(14, 12))
     map_data.plot(
@@ -96,15 +130,16 @@ def analyze_speed_trap(combined, dim_location, nyc_map):
         missing_kwds={'color': '#f0f0f0'}
     )
     
-    map_data_points = map_data.copy()
-    map_data_points["geometry"] = map_data_points.geometry.centroid
-    valid_points = map_data_points.dropna(subset=["nb_interventions"])
+    valid_points = map_data.dropna(subset=["nb_interventions"])
     valid_points = valid_points.sort_values("nb_interventions", ascending=False)
-    sizes = valid_points["nb_interventions"] / valid_points["nb_interventions"].max() * 800
+    xs = valid_points["_cx"].to_numpy()
+    ys = valid_points["_cy"].to_numpy()
+    nb = valid_points["nb_interventions"].to_numpy(dtype=float)
+    sizes = nb / nb.max() * 800
     
     ax.scatter(
-        valid_points.geometry.x, 
-        valid_points.geometry.y, 
+        xs, 
+        ys, 
         s=sizes, 
         facecolors='none',
         edgecolors='#2c3e50',
@@ -114,8 +149,8 @@ def analyze_speed_trap(combined, dim_location, nyc_map):
     )
     
     ax.scatter(
-        valid_points.geometry.x, 
-        valid_points.geometry.y, 
+        xs, 
+        ys, 
         s=10, 
         color='#2c3e50',
         alpha=1
@@ -124,37 +159,47 @@ def analyze_speed_trap(combined, dim_location, nyc_map):
     plt.title("The Speed Trap: Response Time (Color) vs Volume (Ring Size)", fontsize=14)
     plt.axis("off")
     plt.tight_layout()
-    plt.savefig(OUTPUT_FIG / "speed_trap_map.png", dpi=300)
+    plt.savefig(OUTPUT_FIG / "speed_trap_map.png", dpi=200, pil_kwargs=PNG_PIL_KWARGS)
     plt.close()
 
-def analyze_triage_matrix(combined, dim_location):
+def top_k_rows(df, column, k):
+    """
+    Returns the k rows with the largest values in a column, in descending order.
+    
+    Uses a partial partition instead of a full sort, so only the selected rows are ordered.
+    
+    Parameters:
+        df (pd.DataFrame): Input data without missing values in 'column'.
+        column (str): Column to rank by.
+        k (int): Number of rows to keep.
+        
+    Returns:
+        pd.DataFrame: At most k rows of df.
+    """
+    vals = df[column].to_numpy(dtype=float)
+    k = min(k, len(vals))
+    if k == 0:
+        return df.iloc[:0]
+    idx = np.argpartition(-vals, k - 1)[:k]
+    idx = idx[np.argsort(-vals[idx], kind="stable")]
+    return df.iloc[idx]
+
+def analyze_triage_matrix(zip_agg):
     """
     Creates a scatter plot to analyze performance versus demand (Triage Matrix).
     
-    This function groups data by zipcode to compare incident volume against average response time.
+    This function compares incident volume against average response time per zipcode.
     It plots these zipcodes on a scatter chart, drawing quadrant lines at the average volume and
     average response time. It highlights and annotates the most critical zipcodes (high volume, slow response).
     
     Parameters:
-        combined (pd.DataFrame): Combined incident data.
-        dim_location (pd.DataFrame): Location dimension data.
+        zip_agg (pd.DataFrame): Zipcode-level volume and response time aggregates.
         
     Returns:
         None: Saves the generated figure 'triage_matrix.png' to the output directory.
     """
     print("Running Triage Matrix Analysis...")
     
-    agg_loc = combined.groupby("location_key").agg({
-        "nb_interventions": "sum",
-        "response_time": "mean"
-    }).reset_index()
-    
-    merged = agg_loc.merge(dim_location, on="location_key")
-    zip_agg = merged.groupby("zipcode").agg({
-        "nb_interventions": "sum",
-        "response_time": "mean"
-    }).reset_index()
-    
     avg_vol = zip_agg["nb_interventions"].mean()
     avg_resp = zip_agg["response_time"].mean()
     
@@ -165,7 +210,7 @@ def analyze_triage_matrix(combined, dim_location):
     danger_zone = zip_agg[(zip_agg["nb_interventions"] > avg_vol) & (zip_agg["response_time"] > avg_resp)]
     danger_zone = danger_zone.copy()
     danger_zone["impact"] = danger_zone["nb_interventions"] * danger_zone["response_time"]
-    top_danger = danger_zone.nlargest(5, "impact")
+    top_danger = top_k_rows(danger_zone, "impact", 5)
     
     for _, row in top_danger.iterrows():
         plt.text(row["nb_interventions"], row["response_time"], str(row["zipcode"]), fontsize=9, fontweight='bold', color='darkred')
@@ -183,11 +228,48 @@ def analyze_triage_matrix(combined, dim_location):
     plt.savefig(OUTPUT_FIG / "triage_matrix.png")
     plt.close()
 
-def analyze_station_reach(dim_location, dim_firehouse, combined, nyc_map):
+def load_voronoi_cells(fh_points, envelope):
+    """
+    Builds the firehouse Voronoi tessellation, reusing a geoparquet cache when it is up to date.
+    
+    The cells are cached in CACHE_DIR, outside the Power BI model folder, under a name derived from 
+    the modification times of 'Dim_Firehouse.parquet' and the MODZCTA geojson and from the envelope 
+    bounds. Changing any of them rebuilds the cells (and drops the stale cache), while repeated runs 
+    skip the diagram construction entirely.
+    
+    Parameters:
+        fh_points (np.ndarray): Firehouse points used as Voronoi seeds.
+        envelope (shapely.Geometry): Bounding box the diagram is extended to.
+        
+    Returns:
+        gpd.GeoDataFrame: One row per Voronoi cell, with a 'has_firehouse' flag.
+    """
+    sources = [DATA_DIR / "Dim_Firehouse.parquet", SHAPE_PATH]
+    fingerprint = repr(([p.stat().st_mtime_ns for p in sources], tuple(envelope.bounds)))
+    digest = hashlib.sha1(fingerprint.encode()).hexdigest()[:16]
+    cache_path = CACHE_DIR / f"{VORONOI_CACHE_PREFIX}_{digest}.parquet"
+    if cache_path.exists():
+        return gpd.read_parquet(cache_path)
+    
+    voronoi_polys = voronoi_diagram(shapely.multipoints(fh_points), envelope=envelope)
+    cells = shapely.get_parts(voronoi_polys)
+    _, poly_idx_for_fh = STRtree(cells).query(fh_points, predicate="within")
+    
+    has_firehouse = np.zeros(len(cells), dtype=bool)
+    has_firehouse[poly_idx_for_fh] = True
+    gdf_voronoi = gpd.GeoDataFrame({"has_firehouse": has_firehouse}, geometry=cells, crs="EPSG:4326")
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    for stale in CACHE_DIR.glob(f"{VORONOI_CACHE_PREFIX}_*.parquet"):
+        stale.unlink()
+    gdf_voronoi.to_parquet(cache_path)
+    return gdf_voronoi
+
+def analyze_station_reach(zip_agg, dim_firehouse, nyc_map, nyc_outline):
     """
     Performs Voronoi analysis to estimate station reach and performance.
     
-    This function approximates station territories using Voronoi diagrams based on firehouse locations.
+    This function approximates station territories using Voronoi diagrams based on firehouse locations
+    (see load_voronoi_cells).
     It assigns incidents to these territories by spatially joining zipcode centroids to the Voronoi polygons.
     It then aggregates response times within each territory and visualizes the results on a map, clipped 
     to the NYC boundary.
@@ -195,10 +277,10 @@ def analyze_station_reach(dim_location, dim_firehouse, combined, nyc_map):
     The analysis approximates location by using zipcode centroids as we do not have exact incident lat/lon.
     
     Parameters:
-        dim_location (pd.DataFrame): Location dimension data.
+        zip_agg (pd.DataFrame): Zipcode-level volume and response time aggregates.
         dim_firehouse (pd.DataFrame): Firehouse dimension data.
-        combined (pd.DataFrame): Combined incident data.
         nyc_map (gpd.GeoDataFrame): NYC shapefile data.
+        nyc_outline (shapely.Geometry): NYC boundary used to clip the Voronoi cells.
         
     Returns:
         None: Saves the generated figure 'station_reach_voronoi.png' to the output directory.
@@ -206,43 +288,32 @@ def analyze_station_reach(dim_location, dim_firehouse, combined, nyc_map):
     print("Running Station Reach (Voronoi) Analysis...")
     
     fh = dim_firehouse.dropna(subset=["Latitude", "Longitude"])
-    points = [Point(xy) for xy in zip(fh.Longitude, fh.Latitude)]
+    fh_points = shapely.points(fh["Longitude"].to_numpy(dtype=float), fh["Latitude"].to_numpy(dtype=float))
     
     minx, miny, maxx, maxy = nyc_map.total_bounds
     envelope = box(minx, miny, maxx, maxy)
     
-    mp = MultiPoint(points)
-    
     if True:
-        voronoi_polys = voronoi_diagram(mp, envelope=envelope)
-        gs = gpd.GeoSeries([p for p in voronoi_polys.geoms], crs=nyc_map.crs)
+        gdf_voronoi = load_voronoi_cells(fh_points, envelope)
         if nyc_map.crs is None:
             nyc_map.set_crs(epsg=4326, inplace=True)
 
-        gs.crs = "EPSG:4326"
-        gdf_voronoi = gpd.GeoDataFrame(geometry=gs)
         fh_gdf = gpd.GeoDataFrame(
-            fh, geometry=gpd.points_from_xy(fh.Longitude, fh.Latitude), crs="EPSG:4326"
+            fh, geometry=fh_points, crs="EPSG:4326"
         )
         
-        gdf_voronoi = gpd.sjoin(gdf_voronoi, fh_gdf, how="inner", predicate="contains")
-        gdf_voronoi = gdf_voronoi.rename(columns={"index_right": "firehouse_index"})
-        
-        agg_loc = combined.groupby("location_key").agg({"response_time": "mean"}).reset_index()
-        merged = agg_loc.merge(dim_location, on="location_key")
-        zip_stats = merged.groupby("zipcode")["response_time"].mean().reset_index()
+        tree = STRtree(gdf_voronoi.geometry.values)
         
-        nyc_map["MODZCTA"] = nyc_map["MODZCTA"].astype(str)
-        zip_stats["zipcode"] = zip_stats["zipcode"].astype(str)
+        zip_rt_by_code = zip_agg.set_index("zipcode")["response_time"]
+        zip_rt = zip_rt_by_code.reindex(nyc_map["MODZCTA"]).to_numpy(dtype=float, na_value=np.nan)
+        valid = ~np.isnan(zip_rt)
+        pt_idx, poly_idx_for_zip = tree.query(nyc_map["_centroid"].values[valid], predicate="within")
         
-        zip_geo = nyc_map.merge(zip_stats, left_on="MODZCTA", right_on="zipcode", how="inner")
-        zip_geo["centroid"] = zip_geo.geometry.centroid
-        zip_points = zip_geo.set_geometry("centroid")
-        
-        joined = gpd.sjoin(zip_points, gdf_voronoi, how="inner", predicate="within")
-        voronoi_stats = joined.groupby("index_right")["response_time"].mean().reset_index()
-        gdf_voronoi = gdf_voronoi.merge(voronoi_stats, left_index=True, right_on="index_right", how="left")
-        nyc_outline = nyc_map.dissolve()
+        n_polys = len(gdf_voronoi)
+        counts = np.bincount(poly_idx_for_zip, minlength=n_polys)
+        sums = np.bincount(poly_idx_for_zip, weights=zip_rt[valid][pt_idx], minlength=n_polys)
+        gdf_voronoi["response_time"] = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+        gdf_voronoi = gdf_voronoi[gdf_voronoi["has_firehouse"]]
         gdf_voronoi_clipped = gpd.clip(gdf_voronoi, nyc_outline)
         
         fig, ax = plt.subplots(figsize=(12, 10))
@@ -256,7 +327,7 @@ def analyze_station_reach(dim_location, dim_firehouse, combined, nyc_map):
     plt.axis("off")
     plt.legend()
     plt.tight_layout()
-    plt.savefig(OUTPUT_FIG / "station_reach_voronoi.png")
+    plt.savefig(OUTPUT_FIG / "station_reach_voronoi.png", pil_kwargs=PNG_PIL_KWARGS)
     plt.close()
 
 def main():
@@ -264,13 +335,24 @@ def main():
     Main entry point for the geographic analysis script.
     
     Orchestrates the loading of data and execution of three primary analyses:
-    Speed Trap (Map), Triage Matrix (Scatter), and Station Reach (Voronoi).
+    Speed Trap (Map), Triage Matrix (Scatter), and Station Reach (Voronoi). The three figures are 
+    independent and are rendered in separate worker processes, started after the incident-level frame 
+    has been reduced to per-zipcode aggregates and released.
     """
-    dim_location, dim_firehouse, combined, nyc_map = load_data()
-    
-    analyze_speed_trap(combined, dim_location, nyc_map)
-    analyze_triage_matrix(combined, dim_location)
-    analyze_station_reach(dim_location, dim_firehouse, combined, nyc_map)
+    dim_location, dim_firehouse, combined, nyc_map, nyc_outline = load_data()
+    
+    zip_agg = build_zip_agg(combined, dim_location)
+    del combined, dim_location
+    gc.collect()
+    
+    with ProcessPoolExecutor(max_workers=3) as ex:
+        futures = [
+            ex.submit(analyze_speed_trap, zip_agg, nyc_map),
+            ex.submit(analyze_triage_matrix, zip_agg),
+            ex.submit(analyze_station_reach, zip_agg, dim_firehouse, nyc_map, nyc_outline),
+        ]
+        for future in futures:
+            future.result()
     
     print("Geographic V2 Analysis Complete. Figures in", OUTPUT_FIG)
 
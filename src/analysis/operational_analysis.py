@@ -5,6 +5,12 @@ import numpy as np
 import plotly.graph_objects as go
 import os
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from _facts_io import aggregate_facts, read_facts_where
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 DATA_DIR = PROJECT_ROOT / "data" / "processed" / "galaxy_schema"
@@ -17,32 +23,53 @@ OUTPUT_REPORT.mkdir(parents=True, exist_ok=True)
 sns.set_style("whitegrid")
 plt.rcParams['figure.dpi'] = 150
 
+LOAD_BIN_WIDTH = 20
+FAST_RENDER = os.getenv("FAST_RENDER", "").strip().lower() in {"1", "true", "yes"}
+
 def load_data():
     """
     Loads operational datasets required for analysis.
     
     This function reads parquet files to load incident type dimensions, and both Fire and EMS incident facts.
-    It selects specific columns relevant to operational analysis such as dispatch time, travel time,
-    and unit assignments.
+    Fire facts are never loaded row by row: they are streamed through Arrow and reduced to the hourly
+    system load and to the resource cost per incident type. EMS rows are filtered to call type 
+    mismatches at read time and both call type columns share one categorical dtype.
         
     Returns:
         tuple: A tuple containing:
             - dim_incident_type (pd.DataFrame): Incident type dimensions.
-            - f_fire (pd.DataFrame): Fire incident facts with resource usage data.
-            - f_ems (pd.DataFrame): EMS incident facts with call type classifications.
+            - fire_hourly (pd.DataFrame): Units deployed and dispatch time totals per date and hour.
+            - fire_type_cost (pd.DataFrame): Unit-seconds consumed per incident type.
+            - f_ems (pd.DataFrame): EMS incident facts whose initial and final call types differ.
     """
     print("Loading data...")
     dim_incident_type = pd.read_parquet(DATA_DIR / "Dim_IncidentType.parquet")
     
-    cols_fire = ["date_key", "hour", "incident_type_key", "dispatch_time", "travel_time", 
-                 "engines_assigned_quantity", "other_units_assigned_quantity", "ladders_assigned_quantity", "total_units"]
+    cols_ems = ["initial_call_type", "final_call_type"]
     
-    cols_ems = ["date_key", "hour", "incident_type_key", "dispatch_time", "travel_time", "initial_call_type", "final_call_type"]
+    fire_path = DATA_DIR / "Fact_Incidents_Fire.parquet"
+    dispatch = ds.field("dispatch_time").cast("float64")
+    fire_hourly = aggregate_facts(fire_path, ["date_key", "hour"], {
+        "total_units": ds.field("total_units"),
+        "dispatch_time_sum": dispatch,
+        "dispatch_time_count": ds.field("dispatch_time").is_valid().cast("int64"),
+    })
+    active_duration = pc.add(pc.coalesce(dispatch, 0.0), pc.coalesce(ds.field("travel_time").cast("float64"), 0.0))
+    fire_type_cost = aggregate_facts(fire_path, ["incident_type_key"], {
+        "resource_cost_seconds": pc.multiply(ds.field("total_units").cast("float64"), active_duration),
+    })
     
-    f_fire = pd.read_parquet(DATA_DIR / "Fact_Incidents_Fire.parquet", columns=cols_fire)
-    f_ems = pd.read_parquet(DATA_DIR / "Fact_Incidents_EMS.parquet", columns=cols_ems)
+    mismatch = (ds.field("initial_call_type").is_valid() & ds.field("final_call_type").is_valid()
+                & (ds.field("initial_call_type") != ds.field("final_call_type")))
+    f_ems = read_facts_where(DATA_DIR / "Fact_Incidents_EMS.parquet", cols_ems, mismatch,
+                             categories=["initial_call_type", "final_call_type"])
+    call_types = f_ems["initial_call_type"].cat.categories.union(f_ems["final_call_type"].cat.categories)
+    f_ems = f_ems.assign(
+        initial_call_type=f_ems["initial_call_type"].cat.set_categories(call_types),
+        final_call_type=f_ems["final_call_type"].cat.set_categories(call_types),
+    )
     
-    return dim_incident_type, f_fire, f_ems
+    return dim_incident_type, fire_hourly, fire_type_cost, f_ems
 
 def analyze_reality_gap_sankey(f_ems):
     """
@@ -50,27 +77,38 @@ def analyze_reality_gap_sankey(f_ems):
     
     The analysis tracks the 'Reality Gap' by comparing the initial call type (how it was dispatched) 
     versus the final call type (what it actually was). It filters for instances where these do not match, 
-    identifying the top 20 most frequent misclassifications.
+    identifying the top 20 most frequent misclassifications. When the FAST_RENDER environment variable 
+    is "1", "true" or "yes", the figure is written as standalone HTML instead of going through the Kaleido PNG export.
     
     Parameters:
-        f_ems (pd.DataFrame): EMS incident data containing 'initial_call_type' and 'final_call_type'.
+        f_ems (pd.DataFrame): EMS incident data containing 'initial_call_type' and 'final_call_type' as 
+            categoricals sharing the same categories.
         
     Returns:
-        None: Saves the generated figure 'reality_gap_sankey_errors.png' to the output directory.
+        None: Saves the generated figure 'reality_gap_sankey_errors.png' (or '.html' with FAST_RENDER) 
+            to the output directory.
     """
     print("Running Reality Gap (Sankey) - MISCLASSIFICATIONS ONLY...")
     
     try:
-        clean_ems = f_ems.dropna(subset=["initial_call_type", "final_call_type"])
-        mismatches = clean_ems[clean_ems["initial_call_type"] != clean_ems["final_call_type"]].copy()
+        call_types = f_ems["initial_call_type"].cat.categories
+        initial_codes = f_ems["initial_call_type"].cat.codes.to_numpy().astype(np.int64)
+        final_codes = f_ems["final_call_type"].cat.codes.to_numpy().astype(np.int64)
+        mismatch = (initial_codes >= 0) & (final_codes >= 0) & (initial_codes != final_codes)
         
-        if mismatches.empty:
+        if not mismatch.any():
             print("No mismatches found. Check data.")
             return
 
-        flow = mismatches.groupby(["initial_call_type", "final_call_type"]).size().reset_index(name="value")
+        pair_keys, pair_counts = np.unique(initial_codes[mismatch] * len(call_types) + final_codes[mismatch], return_counts=True)
         
-        flow = flow.sort_values("value", ascending=False).head(20)
+        top = np.argsort(-pair_counts, kind="stable")[:20]
+        initial_top, final_top = np.divmod(pair_keys[top], len(call_types))
+        flow = pd.DataFrame({
+            "initial_call_type": call_types[initial_top],
+            "final_call_type": call_types[final_top],
+            "value": pair_counts[top],
+        })
         
         flow['source_label'] = flow['initial_call_type'] + " (Dispatched As)"
         flow['target_label'] = flow['final_call_type'] + " (Actually Was)"
@@ -101,41 +139,46 @@ def analyze_reality_gap_sankey(f_ems):
             font_size=12,
             height=700
         )
-        fig.write_image(OUTPUT_FIG / "reality_gap_sankey_errors.png")
+        if FAST_RENDER:
+            fig.write_html(OUTPUT_FIG / "reality_gap_sankey_errors.html", include_plotlyjs="cdn")
+        else:
+            fig.write_image(OUTPUT_FIG / "reality_gap_sankey_errors.png")
         print("Sankey (Errors Only) generated successfully.")
         
     except Exception as e:
         print(f"Sankey failed: {e}")
 
-def analyze_stress_test_binned(f_fire):
+def analyze_stress_test_binned(fire_hourly):
     """
     Analyzes system performance under load using binned aggregation.
     
-    This method performs a 'stress test' by grouping hourly data into bins based on total units deployed 
-    (system load). It then calculates the average dispatch time for each load bin to reveal how 
+    This method performs a 'stress test' by grouping hourly data into 20-unit bins (right-closed, like 
+    pd.cut) based on total units deployed (system load). It then calculates the average dispatch time for each load bin to reveal how 
     performance degrades as the system approaches saturation.
     
     Parameters:
-        f_fire (pd.DataFrame): Fire incident data containing 'total_units' and 'dispatch_time'.
+        fire_hourly (pd.DataFrame): Hourly fire load with 'total_units', 'dispatch_time_sum' and 'dispatch_time_count'.
         
     Returns:
         None: Saves the generated figure 'stress_test_binned.png' to the output directory.
     """
     print("Running Stress Test (Binned Analysis)...")
     
-    agg = f_fire.groupby(["date_key", "hour"]).agg({
-        "total_units": "sum",
-        "dispatch_time": "mean"
-    }).reset_index()
+    units = fire_hourly["total_units"].to_numpy(dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        dispatch = fire_hourly["dispatch_time_sum"].to_numpy(dtype=float) / fire_hourly["dispatch_time_count"].to_numpy(dtype=float)
+    keep = (dispatch < 600) & (units > 0)
+    units, dispatch = units[keep], dispatch[keep]
     
-    agg = agg[(agg["dispatch_time"] < 600) & (agg["total_units"] > 0)]
+    bin_idx = np.ceil(units / LOAD_BIN_WIDTH).astype(np.intp) - 1
+    bin_counts = np.bincount(bin_idx)
+    bin_sums = np.bincount(bin_idx, weights=dispatch)
+    observed = np.flatnonzero(bin_counts)
     
-    bins = range(0, int(agg["total_units"].max()) + 20, 20)
-    agg["load_bin"] = pd.cut(agg["total_units"], bins=bins)
-    
-    binned_data = agg.groupby("load_bin", observed=True)["dispatch_time"].mean().reset_index()
-    
-    binned_data["bin_mid"] = binned_data["load_bin"].apply(lambda x: x.mid)
+    binned_data = pd.DataFrame({
+        "bin_mid": observed * LOAD_BIN_WIDTH + LOAD_BIN_WIDTH / 2,
+        "dispatch_time": bin_sums[observed] / bin_counts[observed],
+    })
     
     plt.figure(figsize=(12, 7))
     
@@ -153,16 +196,17 @@ def analyze_stress_test_binned(f_fire):
     plt.savefig(OUTPUT_FIG / "stress_test_binned.png")
     plt.close()
 
-def analyze_resource_consumption(f_fire, dim_incident_type):
+def analyze_resource_consumption(fire_type_cost, dim_incident_type):
     """
     Identifies the most resource-intensive incident types.
     
-    This function calculates the total "Active System Seconds" consumed by each incident type.
+    This function calculates the total "Active System Seconds" consumed by each incident type, resolving
+    categories through a key-indexed lookup array rather than a merge.
     The cost is derived from the number of units assigned multiplied by the active duration 
     (dispatch + travel time). It produces a bar chart of the top 10 resource-consuming incident types.
     
     Parameters:
-        f_fire (pd.DataFrame): Fire incident data.
+        fire_type_cost (pd.DataFrame): Unit-seconds consumed per 'incident_type_key'.
         dim_incident_type (pd.DataFrame): Incident type dimension data.
         
     Returns:
@@ -170,13 +214,20 @@ def analyze_resource_consumption(f_fire, dim_incident_type):
     """
     print("Running Resource Consumption Analysis...")
     
-    merged = f_fire.merge(dim_incident_type, on="incident_type_key")
+    type_keys = fire_type_cost["incident_type_key"].to_numpy(dtype=np.int64)
+    dim_keys = dim_incident_type["incident_type_key"].to_numpy(dtype=np.int64)
+    dim_codes, categories = pd.factorize(dim_incident_type["category"])
     
-    merged["active_duration"] = merged["dispatch_time"].fillna(0) + merged["travel_time"].fillna(0)
-    merged["resource_cost_seconds"] = merged["total_units"] * merged["active_duration"]
+    lookup = np.full(max(type_keys.max(initial=0), dim_keys.max(initial=0)) + 1, -1, dtype=np.intp)
+    lookup[dim_keys] = dim_codes
+    cat_codes = lookup[type_keys]
 
-    summary = merged.groupby("category")["resource_cost_seconds"].sum().reset_index()
-    summary["resource_hours"] = summary["resource_cost_seconds"] / 3600
+    has_cat = cat_codes >= 0
+    cost = fire_type_cost["resource_cost_seconds"].to_numpy(dtype=float, na_value=0.0)
+    totals = np.bincount(cat_codes[has_cat], weights=cost[has_cat], minlength=len(categories))
+    present = np.bincount(cat_codes[has_cat], minlength=len(categories)) > 0
+    
+    summary = pd.DataFrame({"category": categories[present], "resource_hours": totals[present] / 3600})
     
     top_consumers = summary.sort_values("resource_hours", ascending=False).head(10)
     plt.figure(figsize=(12, 6))
@@ -199,14 +250,20 @@ def main():
     
     Orchestrates the loading of data and execution of three primary analyses:
     Reality Gap (Sankey), Stress Test (Binned Curve), and Resource Consumption (Bar Chart).
+    The three figures are independent and are rendered in separate worker processes.
     It handles exceptions during execution to ensure robust reporting.
     """
     try:
-        dim_incident_type, f_fire, f_ems = load_data()
+        dim_incident_type, fire_hourly, fire_type_cost, f_ems = load_data()
         
-        analyze_reality_gap_sankey(f_ems)
-        analyze_stress_test_binned(f_fire)
-        analyze_resource_consumption(f_fire, dim_incident_type)
+        with ProcessPoolExecutor(max_workers=3) as ex:
+            futures = [
+                ex.submit(analyze_reality_gap_sankey, f_ems),
+                ex.submit(analyze_stress_test_binned, fire_hourly),
+                ex.submit(analyze_resource_consumption, fire_type_cost, dim_incident_type),
+            ]
+            for future in futures:
+                future.result()
         
         print(f"Operational V3 Analysis Complete. Figures saved in: {OUTPUT_FIG}")
         
@@ -1,83 +1,106 @@
 
 import pandas as pd
 import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
 import os
+import gc
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import pyarrow.dataset as ds
+
+from _facts_io import read_facts_where
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
-DATA_DIR = PROJECT_ROOT / "data" / "processed" / "galaxy_schema"
+CACHE_DIR = PROJECT_ROOT / "data" / "processed" / "analysis_cache"
 OUTPUT_FIG = PROJECT_ROOT / "output" / "figures" / "temporalv7"
 OUTPUT_REPORT = PROJECT_ROOT / "output" / "reports"
 
+COMBINED_COLUMNS = ["hour", "nb_interventions", "travel_time", "dispatch_time", "category", "temp_f"]
+TEMP_BIN_WIDTH = 5
+TEMP_BIN_MAX = 105
+
 OUTPUT_FIG.mkdir(parents=True, exist_ok=True)
 OUTPUT_REPORT.mkdir(parents=True, exist_ok=True)
 
 def load_data():
     """
-    Loads temporal and weather datasets for analysis.
+    Loads the combined incident facts for analysis.
     
-    This function reads parquet files for time, incident type, and weather dimensions, as well as 
-    EMS and Fire incident facts. It adds a 'Source' column to distinguish between EMS and Fire data
-    before returning them.
+    This function reads the denormalized Fact_Incidents_Combined parquet that the galaxy ETL writes to the 
+    analysis cache folder (outside the Power BI model), in 
+    which EMS and Fire incidents are already stacked with their incident category (dictionary-encoded) 
+    and hourly temperature, so no dimension has to be joined here. Only the columns used by the analyses 
+    are read, and rows without an hour (which also have no weather) are dropped in the Parquet scan.
     
     Parameters:
         None
         
     Returns:
-        tuple: A tuple containing:
-            - dim_time (pd.DataFrame): Time dimension data.
-            - dim_incident_type (pd.DataFrame): Incident type dimensions.
-            - dim_weather (pd.DataFrame): Weather dimension data.
-            - f_ems (pd.DataFrame): EMS incident facts.
-            - f_fire (pd.DataFrame): Fire incident facts.
+        pd.DataFrame: EMS and Fire incident facts with a categorical 'category' and a 'temp_f' column.
     """
     print("Loading data...")
-    dim_time = pd.read_parquet(DATA_DIR / "Dim_Time.parquet")
-    dim_incident_type = pd.read_parquet(DATA_DIR / "Dim_IncidentType.parquet")
-    dim_weather = pd.read_parquet(DATA_DIR / "Dim_Weather.parquet")
-    
-    cols_ems = ["date_key", "hour", "nb_interventions", "incident_type_key", "weather_key", "travel_time", "dispatch_time"]
-    cols_fire = ["date_key", "hour", "nb_interventions", "incident_type_key", "weather_key", "travel_time", "dispatch_time"]
-    
-    f_ems = pd.read_parquet(DATA_DIR / "Fact_Incidents_EMS.parquet", columns=cols_ems)
-    f_fire = pd.read_parquet(DATA_DIR / "Fact_Incidents_Fire.parquet", columns=cols_fire)
+    return read_facts_where(CACHE_DIR / "Fact_Incidents_Combined.parquet", COMBINED_COLUMNS, ds.field("hour").is_valid())
+
+def aggregate_by_hour(combined, sums=(), means=()):
+    """
+    Aggregates incident columns per hour of day with np.bincount.
     
-    f_ems["Source"] = "EMS"
-    f_fire["Source"] = "Fire"
+    Rows without an hour are ignored and only hours that contain incidents are returned, matching
+    a pandas groupby on 'hour'. Means skip missing values.
     
-    return dim_time, dim_incident_type, dim_weather, f_ems, f_fire
+    Parameters:
+        combined (pd.DataFrame): Combined EMS and Fire incident data.
+        sums (tuple): Columns to sum per hour.
+        means (tuple): Columns to average per hour.
+        
+    Returns:
+        pd.DataFrame: One row per observed hour with an 'hour' column and the requested aggregates.
+    """
+    hour = combined["hour"].to_numpy(dtype=np.int64, na_value=-1)
+    has_hour = hour >= 0
+    hour = hour[has_hour]
+    present = np.flatnonzero(np.bincount(hour, minlength=24))
+    
+    agg = {"hour": present}
+    for col in sums:
+        values = combined[col].to_numpy(dtype=float, na_value=0.0)[has_hour]
+        agg[col] = np.bincount(hour, weights=values, minlength=24)[present]
+    for col in means:
+        values = combined[col].to_numpy(dtype=float, na_value=np.nan)[has_hour]
+        valid = ~np.isnan(values)
+        totals = np.bincount(hour[valid], weights=values[valid], minlength=24)[present]
+        counts = np.bincount(hour[valid], minlength=24)[present]
+        agg[col] = np.where(counts > 0, totals / np.maximum(counts, 1), np.nan)
+    return pd.DataFrame(agg)
 
-def analyze_gridlock(combined):
+def analyze_gridlock(hourly):
     """
     Analyzes the relationship between time of day, incident volume, and traffic speed.
     
-    This method aggregates data by hour of the day to compare total incident volume against
-    average travel time. It generates a dual-axis chart with bars for volume and a line for 
+    This method uses the hourly aggregate to compare total incident volume against average 
+    travel time. It generates a dual-axis chart with bars for volume and a line for 
     travel time, highlighting "Gridlock" conditions where high volume meets slow travel speeds.
     
     Parameters:
-        combined (pd.DataFrame): Combined EMS and Fire incident data.
+        hourly (pd.DataFrame): Per-hour aggregate from aggregate_by_hour with 'nb_interventions' 
+            and 'travel_time'.
         
     Returns:
         None: Saves the generated figure 'gridlock_analysis.png' to the output directory.
     """
     print("Running Gridlock Analysis (Volume vs Speed)...")
     
-    agg = combined.groupby("hour").agg({
-        "nb_interventions": "sum",
-        "travel_time": "mean"
-    }).reset_index()
-    
     fig, ax1 = plt.subplots(figsize=(12, 6))
 
-    sns.barplot(data=agg, x="hour", y="nb_interventions", color="lightblue", alpha=0.6, ax=ax1, label="Incident Volume")
+    ax1.bar(hourly["hour"], hourly["nb_interventions"], color="lightblue", alpha=0.6, label="Incident Volume")
+    ax1.set_xticks(hourly["hour"])
     ax1.set_ylabel("Total Incidents")
     ax1.set_xlabel("Hour of Day")
     
     ax2 = ax1.twinx()
-    sns.lineplot(data=agg, x="hour", y="travel_time", color="red", marker="o", linewidth=2.5, ax=ax2, label="Avg Travel Time")
+    timed = hourly["travel_time"].notna()
+    ax2.plot(hourly["hour"][timed], hourly["travel_time"][timed], color="red", marker="o", markeredgecolor="white", linewidth=2.5, label="Avg Travel Time")
     ax2.set_ylabel("Travel Time (Seconds)")
     
     ax1.grid(axis='x')
@@ -90,33 +113,55 @@ def analyze_gridlock(combined):
     plt.savefig(OUTPUT_FIG / "gridlock_analysis.png")
     plt.close()
 
-def analyze_risk_heatmap(combined, dim_type):
+def analyze_risk_heatmap(combined):
     """
     Creates a heatmap showing incident intensity by hour and category.
     
-    This function joins incident data with type dimensions to categorize incidents. It creates a
-    pivot table of the top 10 incident categories by volume against the hour of the day. The
-    resulting heatmap visualizes when specific types of risks are most prevalent.
+    This function reads each incident's category codes from the combined facts. It builds a pivot of the 
+    top 10 incident categories by volume against the hour of the day, filled with a single flattened 
+    np.bincount. The resulting heatmap visualizes when specific types of risks are most prevalent.
     
     Parameters:
         combined (pd.DataFrame): Combined EMS and Fire incident data.
-        dim_type (pd.DataFrame): Incident type dimension data.
         
     Returns:
         None: Saves the generated figure 'risk_heatmap.png' to the output directory.
     """
     print("Running Risk Heatmap...")
     
-    merged = combined.merge(dim_type, on="incident_type_key")
-    
-    top_cats = merged["category"].value_counts().nlargest(10).index.tolist()
-    
-    filtered = merged[merged["category"].isin(top_cats)]
-    
-    pivot = filtered.pivot_table(index="hour", columns="category", values="nb_interventions", aggfunc="sum", fill_value=0)
-    
-    plt.figure(figsize=(12, 8))
-    sns.heatmap(pivot, cmap="inferno", annot=False, fmt="d", linewidths=.5)
+    categories = combined["category"].cat.categories
+    cat_codes = combined["category"].cat.codes.to_numpy().astype(np.intp)
+    hours = combined["hour"].to_numpy(dtype=np.int64, na_value=-1)
+    volume = combined["nb_interventions"].to_numpy(dtype=float, na_value=0.0)
+    
+    counts = np.bincount(cat_codes[cat_codes >= 0])
+    top_codes = np.argsort(-counts, kind="stable")[:10]
+    top_names = categories[top_codes]
+    col_order = np.argsort(top_names, kind="stable")
+    
+    column_of = np.full(len(categories) + 1, -1, dtype=np.intp)
+    column_of[top_codes[col_order]] = np.arange(len(top_codes))
+    cols = column_of[cat_codes]
+    keep = (cols >= 0) & (hours >= 0)
+    
+    n_cols = len(top_codes)
+    n_hours = max(24, hours.max(initial=-1) + 1)
+    grid = np.bincount(hours[keep] * n_cols + cols[keep], weights=volume[keep], minlength=n_hours * n_cols)
+    grid = grid.reshape(n_hours, n_cols)
+    present = np.flatnonzero(np.bincount(hours[keep], minlength=n_hours))
+    
+    pivot = pd.DataFrame(grid[present].astype(np.int64), index=pd.Index(present, name="hour"),
+                         columns=pd.Index(top_names[col_order], name="category"))
+    
+    fig, ax = plt.subplots(figsize=(12, 8))
+    mesh = ax.pcolormesh(pivot.to_numpy(), cmap="inferno", edgecolors="white", linewidth=.5, rasterized=True)
+    fig.colorbar(mesh, ax=ax).outline.set_linewidth(0)
+    ax.set_xticks(np.arange(n_cols) + .5, pivot.columns, rotation=90)
+    ax.set_yticks(np.arange(len(present)) + .5, pivot.index)
+    ax.tick_params(length=0)
+    ax.invert_yaxis()
+    for spine in ax.spines.values():
+        spine.set_visible(False)
     plt.title("Risk Heatmap: Incident Intensity by Hour & Type")
     plt.ylabel("Hour of Day")
     plt.xlabel("Incident Category")
@@ -124,7 +169,7 @@ def analyze_risk_heatmap(combined, dim_type):
     plt.savefig(OUTPUT_FIG / "risk_heatmap.png")
     plt.close()
 
-def analyze_shift_change(combined):
+def analyze_shift_change(hourly):
     """
     Investigates performance vulnerabilities during shift changes.
     
@@ -133,17 +178,16 @@ def analyze_shift_change(combined):
     handover between shifts.
     
     Parameters:
-        combined (pd.DataFrame): Combined EMS and Fire incident data.
+        hourly (pd.DataFrame): Per-hour aggregate from aggregate_by_hour with 'dispatch_time'.
         
     Returns:
         None: Saves the generated figure 'shift_change.png' to the output directory.
     """
     print("Running Shift Change Analysis...")
     
-    agg = combined.groupby("hour")["dispatch_time"].mean().reset_index()
-    
     plt.figure(figsize=(10, 6))
-    sns.lineplot(data=agg, x="hour", y="dispatch_time", marker="o", color="purple", linewidth=2)
+    timed = hourly["dispatch_time"].notna()
+    plt.plot(hourly["hour"][timed], hourly["dispatch_time"][timed], marker="o", markeredgecolor="white", color="purple", linewidth=2)
     
     plt.axvline(9, color="orange", linestyle="--", label="Shift Change (9 AM)")
     plt.axvline(18, color="green", linestyle="--", label="Shift Change (6 PM)")
@@ -158,32 +202,36 @@ def analyze_shift_change(combined):
     plt.savefig(OUTPUT_FIG / "shift_change.png")
     plt.close()
 
-def analyze_weather(combined, dim_weather):
+def analyze_weather(combined):
     """
     Analyzes the impact of temperature on incident volume.
     
-    This function groups temperature data into 5-degree buckets and sums the number of incidents
-    within each bucket. A regression plot is generated to visualize the correlation between 
-    temperature and incident frequency.
+    This function groups each incident's hourly temperature into 5-degree buckets (right-closed, 0 to 
+    105 °F) and sums the number of incidents within each bucket. A scatter with a least-squares fit line 
+    is generated to visualize the correlation between temperature and incident frequency.
     
     Parameters:
         combined (pd.DataFrame): Combined EMS and Fire incident data.
-        dim_weather (pd.DataFrame): Weather dimension data.
         
     Returns:
         None: Saves the generated figure 'weather_volume.png' to the output directory.
     """
     print("Running Weather Analysis...")
     
-    merged = combined.merge(dim_weather, on="weather_key")
-    
-    merged["temp_bin"] = pd.cut(merged["temp_f"], bins=range(0, 110, 5))
+    temps = combined["temp_f"].to_numpy(dtype=float, na_value=np.nan)
+    in_range = (temps > 0) & (temps <= TEMP_BIN_MAX)
+    bin_idx = np.ceil(temps[in_range] / TEMP_BIN_WIDTH).astype(np.intp) - 1
+    volume = combined["nb_interventions"].to_numpy(dtype=float, na_value=0.0)[in_range]
     
-    agg = merged.groupby("temp_bin")["nb_interventions"].sum().reset_index()
-    agg["temp_mid"] = agg["temp_bin"].apply(lambda x: x.mid)
+    observed = np.flatnonzero(np.bincount(bin_idx))
+    temp_mid = observed * TEMP_BIN_WIDTH + TEMP_BIN_WIDTH / 2
+    totals = np.bincount(bin_idx, weights=volume)[observed]
     
     plt.figure(figsize=(10, 6))
-    sns.regplot(data=agg, x="temp_mid", y="nb_interventions", scatter_kws={'s': 50}, line_kws={'color': 'red'})
+    plt.scatter(temp_mid, totals, s=50, alpha=0.8)
+    if len(temp_mid) > 1:
+        slope, intercept = np.polyfit(temp_mid, totals, 1)
+        plt.plot(temp_mid, slope * temp_mid + intercept, color="red", linewidth=2)
     
     plt.title("Weather Impact: Temperature vs Incident Volume")
     plt.xlabel("Temperature (°F)")
@@ -200,20 +248,31 @@ def main():
     Orchestrates the loading of data and execution of four primary analyses:
     Gridlock (Volume vs Speed), Risk Heatmap (Time vs Type), Shift Change Vulnerability, 
     and Weather Impact. It combines EMS and Fire data for a holistic view.
+    The hourly aggregate shared by the Gridlock and Shift Change charts is computed once. The four 
+    figures are independent; each worker process receives only the aggregate or columns it reads, and 
+    the full combined frame is released before the workers start.
     """
-    if not os.path.exists(DATA_DIR / "Dim_Weather.parquet"):
-        print("Data not ready. Ensure ETL has run with weather.")
+    if not os.path.exists(CACHE_DIR / "Fact_Incidents_Combined.parquet"):
+        print("Data not ready. Ensure the galaxy ETL has run with weather.")
         return
 
-    dim_time, dim_type, dim_weather, f_ems, f_fire = load_data()
-    
-    common_cols = ["date_key", "hour", "nb_interventions", "incident_type_key", "weather_key", "travel_time", "dispatch_time", "Source"]
-    combined = pd.concat([f_ems[common_cols], f_fire[common_cols]])
-    
-    analyze_gridlock(combined)
-    analyze_risk_heatmap(combined, dim_type)
-    analyze_shift_change(combined)
-    analyze_weather(combined, dim_weather)
+    combined = load_data()
+    
+    hourly = aggregate_by_hour(combined, sums=["nb_interventions"], means=["travel_time", "dispatch_time"])
+    heatmap_cols = combined[["hour", "nb_interventions", "category"]]
+    weather_cols = combined[["temp_f", "nb_interventions"]]
+    del combined
+    gc.collect()
+    
+    with ProcessPoolExecutor(max_workers=4) as ex:
+        futures = [
+            ex.submit(analyze_gridlock, hourly),
+            ex.submit(analyze_risk_heatmap, heatmap_cols),
+            ex.submit(analyze_shift_change, hourly),
+            ex.submit(analyze_weather, weather_cols),
+        ]
+        for future in futures:
+            future.result()
     
     print("V2 Analysis Complete. Figures in", OUTPUT_FIG)
 
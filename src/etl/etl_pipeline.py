@@ -1,7 +1,13 @@
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import warnings
 
 # Suppress warnings for cleaner output
@@ -23,6 +29,20 @@ MEASURE_COLS_SHARED = [
     "INCIDENT_RESPONSE_SECONDS_QY",
     "INCIDENT_TRAVEL_TM_SECONDS_QY",
 ]
+# (source column, dimension name, surrogate key column)
+SMALL_DIMS_EMS = [
+    ("INITIAL_CALL_TYPE", "dim_ems_initial_call_type", "ems_initial_call_type_key"),
+    ("FINAL_CALL_TYPE", "dim_ems_final_call_type", "ems_final_call_type_key"),
+    ("INITIAL_SEVERITY_LEVEL_CODE", "dim_ems_initial_severity", "ems_initial_severity_key"),
+    ("FINAL_SEVERITY_LEVEL_CODE", "dim_ems_final_severity", "ems_final_severity_key"),
+    ("INCIDENT_DISPOSITION_CODE", "dim_ems_disposition", "ems_disposition_key"),
+]
+SMALL_DIMS_FIRE = [
+    ("INCIDENT_CLASSIFICATION_GROUP", "dim_fire_class_group", "fire_class_group_key"),
+    ("INCIDENT_CLASSIFICATION", "dim_fire_class", "fire_class_key"),
+    ("ALARM_SOURCE_DESCRIPTION_TX", "dim_fire_alarm_source", "fire_alarm_source_key"),
+    ("ALARM_LEVEL_INDEX_DESCRIPTION", "dim_fire_alarm_level", "fire_alarm_level_key"),
+]
 LOC_COLS = [
     "BOROUGH_NORM",
     "ZIPCODE",
@@ -33,14 +53,30 @@ LOC_COLS = [
     "CONGRESSIONALDISTRICT",
 ]
 
+# Below this many staged rows, builds run one after another
+PARALLEL_MIN_ROWS = 200_000
+
+# Columns the pipeline parses or coerces itself are read as plain strings, so a stray
+# value deep in the file cannot break Arrow's type inference
+CSV_STRING_COLS = DT_COLS_COMMON + DT_COLS_EMS_EXTRA + MEASURE_COLS_SHARED + [c for c in LOC_COLS if c != "BOROUGH_NORM"]
+CSV_BLOCK_SIZE = 64 << 20
+PARQUET_ROW_GROUP_SIZE = 512_000
+DT_FORMAT = "%m/%d/%Y %I:%M:%S %p"
+# Indexed by month number; slot 0 catches missing dates
+SEASON_BY_MONTH = np.array(["Unknown"] + ["Winter"] * 2 + ["Spring"] * 3 + ["Summer"] * 3 + ["Fall"] * 3 + ["Winter"], dtype=object)
+
 # Determine project root
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 DATA_RAW = PROJECT_ROOT / "data" / "raw"
 OUTPUT_DIR = PROJECT_ROOT / "data" / "processed" / "powerbi_parquet"
+CSV_CACHE_DIR = PROJECT_ROOT / "data" / "processed" / "csv_cache"
+# Schema metadata key holding the read settings a cached table was parsed with
+CSV_CACHE_KEY = b"csv_cache_fingerprint"
 
 def norm_text(s: pd.Series) -> pd.Series:
     """
     Normalize text series by stripping whitespace and converting to uppercase.
+    Uses Arrow-backed strings so strip/upper run as vectorized Arrow kernels.
 
     Args:
         s (pd.Series): Input text series.
@@ -48,11 +84,28 @@ def norm_text(s: pd.Series) -> pd.Series:
     Returns:
         pd.Series: Normalized text series.
     """
-    return s.astype("string").str.strip().str.upper()
+    return s.astype("string[pyarrow]").str.strip().str.upper()
+
+def norm_category(s: pd.Series) -> pd.Series:
+    """
+    Normalize a low-cardinality text series into a categorical with sorted categories.
+    norm_text only runs on the distinct raw values; rows are mapped through integer codes.
+
+    Args:
+        s (pd.Series): Input text series.
+
+    Returns:
+        pd.Series: Normalized categorical series.
+    """
+    codes, uniques = pd.factorize(s, sort=False)
+    norm_codes, categories = pd.factorize(norm_text(pd.Series(uniques)), sort=True)
+    cat_codes = np.append(norm_codes, -1)[codes]
+    return pd.Series(pd.Categorical.from_codes(cat_codes, categories), index=s.index)
 
 def norm_borough(s: pd.Series) -> pd.Series:
     """
     Normalize borough names, standardizing variations of Staten Island.
+    Only the unique raw names are normalized, then scattered back to every row.
 
     Args:
         s (pd.Series): Input borough series.
@@ -60,33 +113,54 @@ def norm_borough(s: pd.Series) -> pd.Series:
     Returns:
         pd.Series: Normalized borough series.
     """
-    x = norm_text(s)
-    return x.replace(
+    codes, uniques = pd.factorize(s, sort=False)
+    x = norm_text(pd.Series(uniques)).replace(
         {
             "RICHMOND / STATEN ISLAND": "STATEN ISLAND",
             "RICHMOND": "STATEN ISLAND",
             "STATEN ISLAND": "STATEN ISLAND",
         }
     )
+    return pd.Series(x.array.take(codes, allow_fill=True), index=s.index, name=s.name)
 
 def clean_seconds(s: pd.Series) -> pd.Series:
     """
     Clean duration columns by handling negative values and excessive outliers.
+    Durations repeat heavily, so only the unique values are converted and masked, then gathered back.
 
     Args:
         s (pd.Series): Input numeric series (seconds).
 
     Returns:
-        pd.Series: Cleaned numeric series.
+        pd.Series: Cleaned float32 series.
+    """
+    codes, uniques = pd.factorize(s, sort=False)
+    values = pd.to_numeric(pd.Series(uniques), errors="coerce").to_numpy(dtype="float32", na_value=np.nan)
+    values = np.append(values, np.float32(np.nan))
+    np.putmask(values, (values < 0) | (values >= 999), np.nan)
+    return pd.Series(values[codes], index=s.index)
+
+def coerce_int_codes(s: pd.Series) -> pd.Series:
+    """
+    Coerce a repetitive code column to nullable integers.
+    Only the unique values go through pd.to_numeric, then they are scattered back to every row.
+
+    Args:
+        s (pd.Series): Input code series (numbers or numeric strings).
+
+    Returns:
+        pd.Series: Int64 series; unparseable values become NA.
     """
-    x = pd.to_numeric(s, errors="coerce")
-    x = x.mask(x < 0, np.nan)
-    x = x.mask(x >= 999, np.nan)
-    return x
+    codes, uniques = pd.factorize(s, sort=False)
+    values = pd.to_numeric(pd.Series(uniques), errors="coerce").astype("Int64").array
+    return pd.Series(values.take(codes, allow_fill=True), index=s.index, name=s.name)
 
 def parse_dt(s: pd.Series) -> pd.Series:
     """
     Parse datetime series with specific formatting.
+    Only the unique strings are parsed, with Arrow's vectorized strptime, then scattered back to every row.
+    Strings that do not format back to themselves (rolled-over dates, stray blanks, unpadded fields)
+    are re-parsed with pandas so the result matches pd.to_datetime(format=DT_FORMAT, errors="coerce").
 
     Args:
         s (pd.Series): Input datetime string series.
@@ -94,11 +168,43 @@ def parse_dt(s: pd.Series) -> pd.Series:
     Returns:
         pd.Series: Parsed datetime series.
     """
-    return pd.to_datetime(s, format="%m/%d/%Y %I:%M:%S %p", errors="coerce")
+    codes, uniques = pd.factorize(s, sort=False)
+    raw = pa.array(np.asarray(uniques, dtype=object), type=pa.string())
+    parsed = pc.strptime(raw, format=DT_FORMAT, unit="s", error_is_null=True)
+    # Copy so the suspect values can be patched; Arrow hands back a read-only view when there are no nulls
+    values = np.array(parsed.cast(pa.timestamp("ns")).to_numpy(zero_copy_only=False), copy=True)
+
+    round_trip = pc.fill_null(pc.equal(pc.strftime(parsed, format=DT_FORMAT), raw), False)
+    suspect = np.flatnonzero(~round_trip.to_numpy(zero_copy_only=False))
+    if len(suspect):
+        strict = pd.to_datetime(pd.Index(uniques[suspect]), format=DT_FORMAT, errors="coerce")
+        values[suspect] = strict.as_unit("ns").to_numpy()
+
+    values = np.append(values, np.datetime64("NaT", "ns"))
+    return pd.Series(values[codes], index=s.index, name=s.name)
+
+def split_ymd(d: np.ndarray) -> tuple:
+    """
+    Split a datetime64 array into year, month and day integer arrays.
+
+    Args:
+        d (np.ndarray): Input datetime64 array.
+
+    Returns:
+        tuple: (year, month, day) int32 arrays.
+    """
+    days = d.astype("datetime64[D]")
+    months = days.astype("datetime64[M]")
+    years = days.astype("datetime64[Y]")
+    y = years.astype("int32") + 1970
+    m = (months - years).astype("int32") + 1
+    day = (days - months).astype("int32") + 1
+    return y, m, day
 
 def date_key_from_dt(s: pd.Series) -> pd.Series:
     """
     Generate an integer date key (YYYYMMDD) from a datetime series.
+    Keys are computed once per calendar day in the observed range and gathered by day offset.
 
     Args:
         s (pd.Series): Input datetime series.
@@ -106,8 +212,18 @@ def date_key_from_dt(s: pd.Series) -> pd.Series:
     Returns:
         pd.Series: Integer date keys.
     """
-    d = s.dt.floor("D")
-    return (d.dt.year * 10000 + d.dt.month * 100 + d.dt.day).astype("Int32")
+    d = s.to_numpy(dtype="datetime64[ns]")
+    nat = np.isnat(d)
+    days = d.astype("datetime64[D]").astype("int64")
+    if nat.all():
+        return pd.Series(pd.array([pd.NA] * len(d), dtype="Int32"), index=s.index)
+    first = days[~nat].min()
+    last = days[~nat].max()
+    y, m, day = split_ymd(np.arange(first, last + 1).astype("datetime64[D]"))
+    day_keys = y * 10000 + m * 100 + day
+    keys = pd.array(day_keys[np.where(nat, 0, days - first)], dtype="Int32")
+    keys[nat] = pd.NA
+    return pd.Series(keys, index=s.index)
 
 def get_fiscal_year(date: pd.Series) -> pd.Series:
     """
@@ -132,15 +248,72 @@ def get_season(date: pd.Series) -> pd.Series:
     Returns:
         pd.Series: Season name (Winter, Spring, Summer, Fall).
     """
-    month = date.dt.month
-    conditions = [
-        (month.isin([12, 1, 2])),
-        (month.isin([3, 4, 5])),
-        (month.isin([6, 7, 8])),
-        (month.isin([9, 10, 11]))
-    ]
-    choices = ['Winter', 'Spring', 'Summer', 'Fall']
-    return pd.Series(np.select(conditions, choices, default='Unknown'), index=date.index)
+    month = date.dt.month.fillna(0).to_numpy(dtype="int64")
+    return pd.Series(SEASON_BY_MONTH[month], index=date.index)
+
+def csv_fingerprint(path, string_cols):
+    """
+    Describe a CSV file and the settings it is parsed with, for cache validation.
+
+    Args:
+        path (Path): CSV file path.
+        string_cols (list): Columns read as strings.
+
+    Returns:
+        bytes: Fingerprint stored in the cached table's schema metadata.
+    """
+    stat = path.stat()
+    return repr((stat.st_mtime_ns, stat.st_size, sorted(string_cols), pa.__version__)).encode()
+
+def read_csv_cache(cache_path, fingerprint):
+    """
+    Memory-map a cached feather table if it was parsed with the same settings.
+
+    Args:
+        cache_path (Path): Feather cache file path.
+        fingerprint (bytes): Expected fingerprint from csv_fingerprint.
+
+    Returns:
+        pa.Table: Cached table, or None if missing or stale.
+    """
+    if not cache_path.exists():
+        return None
+    table = feather.read_table(cache_path, memory_map=True)
+    if (table.schema.metadata or {}).get(CSV_CACHE_KEY) != fingerprint:
+        return None
+    return table
+
+def read_csv(path, string_cols=()):
+    """
+    Read a CSV file with pyarrow's multithreaded parser and convert it to pandas.
+    Empty fields and the usual NA markers become nulls, as with pd.read_csv.
+    The parsed table is cached as an uncompressed feather file in CSV_CACHE_DIR
+    and memory-mapped on later runs. The cache is rebuilt when the CSV, the
+    string columns or the pyarrow version change.
+
+    Args:
+        path (Path): CSV file path.
+        string_cols (list): Columns to read as strings instead of inferring their type.
+
+    Returns:
+        pd.DataFrame: Parsed data.
+    """
+    cache_path = CSV_CACHE_DIR / path.with_suffix(".feather").name
+    fingerprint = csv_fingerprint(path, string_cols)
+    table = read_csv_cache(cache_path, fingerprint)
+    if table is None:
+        table = pacsv.read_csv(
+            path,
+            read_options=pacsv.ReadOptions(use_threads=True, block_size=CSV_BLOCK_SIZE),
+            convert_options=pacsv.ConvertOptions(
+                column_types={c: pa.string() for c in string_cols},
+                strings_can_be_null=True,
+            ),
+        )
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), CSV_CACHE_KEY: fingerprint})
+        CSV_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        feather.write_feather(table, cache_path, compression="uncompressed")
+    return table.to_pandas(split_blocks=True, self_destruct=True)
 
 def load_data():
     """
@@ -151,9 +324,9 @@ def load_data():
     """
     print("Loading data...")
     try:
-        ems = pd.read_csv(DATA_RAW / 'EMS.csv')
-        fire = pd.read_csv(DATA_RAW / 'FIRE.csv')
-        fire_stations = pd.read_csv(DATA_RAW / 'Firehouse.csv')
+        ems = read_csv(DATA_RAW / 'EMS.csv', CSV_STRING_COLS)
+        fire = read_csv(DATA_RAW / 'FIRE.csv', CSV_STRING_COLS)
+        fire_stations = read_csv(DATA_RAW / 'Firehouse.csv')
         print(f"Loaded: EMS ({len(ems)} rows), FIRE ({len(fire)} rows), Firehouse ({len(fire_stations)} rows)")
         return ems, fire, fire_stations
     except FileNotFoundError as e:
@@ -162,7 +335,8 @@ def load_data():
 
 def make_staging(ems, fire):
     """
-    Create staging dataframes by normalizing boroughs, parsing datetimes, and cleaning measures.
+    Create staging dataframes by normalizing boroughs and code columns, parsing datetimes, and cleaning measures.
+    Small-dimension code columns are staged as categoricals.
 
     Args:
         ems (pd.DataFrame): Raw EMS data.
@@ -172,27 +346,38 @@ def make_staging(ems, fire):
         tuple: (ems_c, fire_c) cleaned pandas DataFrames.
     """
     print("Creating staging tables...")
-    ems_c = ems.copy()
-    fire_c = fire.copy()
+    new_ems = {}
+    new_fire = {}
 
-    ems_c["BOROUGH_NORM"] = norm_borough(ems_c["BOROUGH"]) if "BOROUGH" in ems_c.columns else pd.NA
-    fire_c["BOROUGH_NORM"] = norm_borough(fire_c["INCIDENT_BOROUGH"]) if "INCIDENT_BOROUGH" in fire_c.columns else pd.NA
+    new_ems["BOROUGH_NORM"] = norm_borough(ems["BOROUGH"]) if "BOROUGH" in ems.columns else pd.NA
+    new_fire["BOROUGH_NORM"] = norm_borough(fire["INCIDENT_BOROUGH"]) if "INCIDENT_BOROUGH" in fire.columns else pd.NA
 
     print("Parsing datetimes...")
     for c in DT_COLS_COMMON + DT_COLS_EMS_EXTRA:
-        if c in ems_c.columns:
-            ems_c[c] = parse_dt(ems_c[c])
+        if c in ems.columns:
+            new_ems[c] = parse_dt(ems[c])
     for c in DT_COLS_COMMON:
-        if c in fire_c.columns:
-            fire_c[c] = parse_dt(fire_c[c])
+        if c in fire.columns:
+            new_fire[c] = parse_dt(fire[c])
 
     print("Cleaning measures...")
     for c in MEASURE_COLS_SHARED:
-        if c in ems_c.columns:
-            ems_c[c + "_CLEAN"] = clean_seconds(ems_c[c])
-        if c in fire_c.columns:
-            fire_c[c + "_CLEAN"] = clean_seconds(fire_c[c])
-            
+        if c in ems.columns:
+            new_ems[c + "_CLEAN"] = clean_seconds(ems[c])
+        if c in fire.columns:
+            new_fire[c + "_CLEAN"] = clean_seconds(fire[c])
+
+    print("Normalizing codes...")
+    for c, _, _ in SMALL_DIMS_EMS:
+        if c in ems.columns:
+            new_ems[c + "_NORM"] = norm_category(ems[c])
+    for c, _, _ in SMALL_DIMS_FIRE:
+        if c in fire.columns:
+            new_fire[c + "_NORM"] = norm_category(fire[c])
+
+    # assign() shares the untouched raw columns instead of deep-copying both frames
+    ems_c = ems.assign(**new_ems)
+    fire_c = fire.assign(**new_fire)
     return ems_c, fire_c
 
 def build_dim_time(ems_c, fire_c, datetime_cols):
@@ -219,15 +404,15 @@ def build_dim_time(ems_c, fire_c, datetime_cols):
         .dropna()
         .dt.floor("D")
         .drop_duplicates()
-        .sort_values()
         .reset_index(drop=True)
     )
 
     dim = pd.DataFrame({"date": all_dt})
-    dim["date_key"] = (dim["date"].dt.year * 10000 + dim["date"].dt.month * 100 + dim["date"].dt.day).astype("int32")
-    dim["year"] = dim["date"].dt.year.astype("int16")
-    dim["month"] = dim["date"].dt.month.astype("int8")
-    dim["day"] = dim["date"].dt.day.astype("int8")
+    y, m, day = split_ymd(dim["date"].to_numpy())
+    dim["date_key"] = (y * 10000 + m * 100 + day).astype("int32")
+    dim["year"] = y.astype("int16")
+    dim["month"] = m.astype("int8")
+    dim["day"] = day.astype("int8")
     dim["day_of_week"] = dim["date"].dt.weekday + 1 # 1=Mon, 7=Sun
     dim["day_name"] = dim["date"].dt.day_name()
     dim["is_weekend"] = dim["day_of_week"].isin([6, 7]).astype("int8")
@@ -238,6 +423,25 @@ def build_dim_time(ems_c, fire_c, datetime_cols):
     
     return dim
 
+def location_frame(df, loc_cols=LOC_COLS):
+    """
+    Extract location columns with consistent dtypes for dimension matching.
+
+    Args:
+        df (pd.DataFrame): Staged data.
+        loc_cols (list): Location columns to extract; missing ones are filled with NA.
+
+    Returns:
+        pd.DataFrame: Location attributes (Int32 codes, string borough).
+    """
+    out = df.reindex(columns=loc_cols)
+    num_cols = [c for c in loc_cols if c != "BOROUGH_NORM"]
+    for c in num_cols:
+        out[c] = coerce_int_codes(out[c]).astype("Int32")
+    if "BOROUGH_NORM" in out.columns:
+        out["BOROUGH_NORM"] = out["BOROUGH_NORM"].astype("string[pyarrow]")
+    return out
+
 def build_dim_location(ems_c, fire_c, loc_cols=LOC_COLS):
     """
     Build the Location Dimension table by extracting unique location attributes.
@@ -251,20 +455,17 @@ def build_dim_location(ems_c, fire_c, loc_cols=LOC_COLS):
         pd.DataFrame: Dimension Location table.
     """
     print("Building Dim_Location...")
-    parts = []
-    for df in (ems_c, fire_c):
-        use = [c for c in loc_cols if c in df.columns]
-        parts.append(df[use].copy())
-
-    dim = pd.concat(parts, ignore_index=True).drop_duplicates()
+    use = [c for c in loc_cols if c in ems_c.columns or c in fire_c.columns]
+    parts = [location_frame(df, use) for df in (ems_c, fire_c)]
+    all_locs = pd.concat(parts, ignore_index=True)
 
-    for c in dim.columns:
-        if c != "BOROUGH_NORM":
-            dim[c] = pd.to_numeric(dim[c], errors="coerce").astype("Int64")
-        else:
-            dim[c] = dim[c].astype("string")
+    row_key = np.zeros(len(all_locs), dtype=np.int64)
+    for c in use:
+        codes, uniques = pd.factorize(all_locs[c])
+        row_key, _ = pd.factorize(row_key * (len(uniques) + 1) + (codes + 1))
+    _, first = np.unique(row_key, return_index=True)
 
-    dim = dim.sort_values(dim.columns.tolist(), na_position="last").reset_index(drop=True)
+    dim = all_locs.iloc[first].reset_index(drop=True)
     dim.insert(0, "location_key", (np.arange(len(dim)) + 1).astype("int32"))
     return dim
 
@@ -284,7 +485,7 @@ def build_dim_firehouse(firehouses):
         fh["Borough_Norm"] = norm_borough(fh["Borough"])
     
     if "Postcode" in fh.columns:
-         fh["Postcode"] = pd.to_numeric(fh["Postcode"], errors='coerce').astype("Int64")
+         fh["Postcode"] = pd.to_numeric(fh["Postcode"], errors='coerce').astype("Int32")
 
     dim = fh.drop_duplicates().reset_index(drop=True)
     dim.insert(0, "firehouse_key", (np.arange(len(dim)) + 1).astype("int32"))
@@ -325,21 +526,16 @@ def build_small_dims(ems_c, fire_c):
     dims = {}
 
     def build_one(df, col, key_name):
-        if col not in df.columns: return None
-        dim = pd.DataFrame({col: norm_text(df[col])}).dropna().drop_duplicates().sort_values(col).reset_index(drop=True)
+        if col + "_NORM" not in df.columns: return None
+        # Staged codes are categoricals whose sorted categories are exactly the values present
+        dim = pd.DataFrame({col: df[col + "_NORM"].cat.categories.astype("string[pyarrow]")})
         dim.insert(0, key_name, (np.arange(len(dim)) + 1).astype("int32"))
         return dim
 
-    dims["dim_ems_initial_call_type"] = build_one(ems_c, "INITIAL_CALL_TYPE", "ems_initial_call_type_key")
-    dims["dim_ems_final_call_type"] = build_one(ems_c, "FINAL_CALL_TYPE", "ems_final_call_type_key")
-    dims["dim_ems_initial_severity"] = build_one(ems_c, "INITIAL_SEVERITY_LEVEL_CODE", "ems_initial_severity_key")
-    dims["dim_ems_final_severity"] = build_one(ems_c, "FINAL_SEVERITY_LEVEL_CODE", "ems_final_severity_key")
-    dims["dim_ems_disposition"] = build_one(ems_c, "INCIDENT_DISPOSITION_CODE", "ems_disposition_key")
-
-    dims["dim_fire_class_group"] = build_one(fire_c, "INCIDENT_CLASSIFICATION_GROUP", "fire_class_group_key")
-    dims["dim_fire_class"] = build_one(fire_c, "INCIDENT_CLASSIFICATION", "fire_class_key")
-    dims["dim_fire_alarm_source"] = build_one(fire_c, "ALARM_SOURCE_DESCRIPTION_TX", "fire_alarm_source_key")
-    dims["dim_fire_alarm_level"] = build_one(fire_c, "ALARM_LEVEL_INDEX_DESCRIPTION", "fire_alarm_level_key")
+    for col, dim_name, key_name in SMALL_DIMS_EMS:
+        dims[dim_name] = build_one(ems_c, col, key_name)
+    for col, dim_name, key_name in SMALL_DIMS_FIRE:
+        dims[dim_name] = build_one(fire_c, col, key_name)
 
     return {k: v for k, v in dims.items() if v is not None}
 
@@ -355,27 +551,23 @@ def attach_location_key(df, dim_location, loc_cols=LOC_COLS):
     Returns:
         pd.Series: Location keys.
     """
-    use = [c for c in loc_cols if c in df.columns]
-    left = df[use].copy()
-    for c in left.columns:
-        if c != "BOROUGH_NORM":
-            left[c] = pd.to_numeric(left[c], errors="coerce").astype("Int64")
-        else:
-            left[c] = left[c].astype("string")
-            
-    right_cols = [c for c in loc_cols if c in dim_location.columns]
-    right = dim_location[right_cols + ["location_key"]].copy()
-    on_cols = [c for c in right_cols if c in left.columns]
-    
-    merged = left.merge(right, on=on_cols, how="left")
-    return merged["location_key"]
+    on_cols = [c for c in loc_cols if c in dim_location.columns]
+    left = location_frame(df, on_cols)
+
+    dim_index = pd.MultiIndex.from_frame(dim_location[on_cols])
+    pos = dim_index.get_indexer(pd.MultiIndex.from_frame(left))
+
+    keys = pd.array(dim_location["location_key"].to_numpy()[pos], dtype="Int32")
+    keys[pos == -1] = pd.NA
+    return pd.Series(keys, index=df.index)
 
 def attach_dim_key(df, dim, col, key_col):
     """
     Attach a generic dimension surrogate key to a fact table.
+    Matches on the normalized `<col>_NORM` column created by make_staging.
 
     Args:
-        df (pd.DataFrame): Fact table.
+        df (pd.DataFrame): Fact table (staging).
         dim (pd.DataFrame): Dimension table.
         col (str): Column name to match.
         key_col (str): Key column name in dimension.
@@ -383,10 +575,12 @@ def attach_dim_key(df, dim, col, key_col):
     Returns:
         pd.Series: Surrogate keys.
     """
-    if dim is None or col not in df.columns:
-        return pd.Series(pd.array([pd.NA] * len(df), dtype="Int32"))
-    tmp = pd.DataFrame({col: norm_text(df[col])})
-    return tmp.merge(dim[[col, key_col]], on=col, how="left")[key_col].astype("Int32")
+    if dim is None or col + "_NORM" not in df.columns:
+        return pd.Series(pd.array([pd.NA] * len(df), dtype="Int32"), index=df.index)
+    cat = pd.Categorical(df[col + "_NORM"], categories=dim[col].to_numpy())
+    keys = pd.array(dim[key_col].to_numpy()[cat.codes], dtype="Int32")
+    keys[cat.codes == -1] = pd.NA
+    return pd.Series(keys, index=df.index)
 
 def build_fact_ems(ems_c, dim_location, dims_other):
     """
@@ -416,15 +610,21 @@ def build_fact_ems(ems_c, dim_location, dims_other):
             fact[c.lower() + "_seconds"] = ems_c[cc]
 
     print("  Attaching Small Dim Keys...")
-    fact["ems_initial_call_type_key"] = attach_dim_key(ems_c, dims_other.get("dim_ems_initial_call_type"), "INITIAL_CALL_TYPE", "ems_initial_call_type_key")
-    fact["ems_final_call_type_key"] = attach_dim_key(ems_c, dims_other.get("dim_ems_final_call_type"), "FINAL_CALL_TYPE", "ems_final_call_type_key")
-    fact["ems_initial_severity_key"] = attach_dim_key(ems_c, dims_other.get("dim_ems_initial_severity"), "INITIAL_SEVERITY_LEVEL_CODE", "ems_initial_severity_key")
-    fact["ems_final_severity_key"] = attach_dim_key(ems_c, dims_other.get("dim_ems_final_severity"), "FINAL_SEVERITY_LEVEL_CODE", "ems_final_severity_key")
-    fact["ems_disposition_key"] = attach_dim_key(ems_c, dims_other.get("dim_ems_disposition"), "INCIDENT_DISPOSITION_CODE", "ems_disposition_key")
+    fact = fact.assign(**{
+        key_col: attach_dim_key(ems_c, dims_other.get(dim_name), col, key_col)
+        for col, dim_name, key_col in SMALL_DIMS_EMS
+    })
 
+    # First three categories are truthy, last three falsy; anything else is kept as-is.
+    # The mapping is worked out on the few normalized values, then gathered per row.
+    flag_values = ["TRUE", "Y", "1", "FALSE", "N", "0"]
     for flag in ["HELD_INDICATOR", "REOPEN_INDICATOR", "SPECIAL_EVENT_INDICATOR", "STANDBY_INDICATOR", "TRANSFER_INDICATOR"]:
         if flag in ems_c.columns:
-            fact[flag.lower()] = norm_text(ems_c[flag]).replace({"TRUE": "1", "FALSE": "0", "Y": "1", "N": "0"}).astype("string")
+            x = norm_category(ems_c[flag])
+            values = pd.Series(x.cat.categories, dtype="string")
+            codes = pd.Categorical(values, categories=flag_values).codes
+            values = values.where(codes < 0, np.where(codes < 3, "1", "0"))
+            fact[flag.lower()] = pd.Series(values.array.take(x.cat.codes.to_numpy(), allow_fill=True), index=ems_c.index)
 
     return fact
 
@@ -457,13 +657,13 @@ def build_fact_fire(fire_c, dim_location, dims_other):
 
     for c in ["ENGINES_ASSIGNED_QUANTITY", "LADDERS_ASSIGNED_QUANTITY", "OTHER_UNITS_ASSIGNED_QUANTITY"]:
         if c in fire_c.columns:
-            fact[c.lower()] = pd.to_numeric(fire_c[c], errors="coerce")
+            fact[c.lower()] = coerce_int_codes(fire_c[c]).astype("Int16")
 
     print("  Attaching Small Dim Keys...")
-    fact["fire_class_group_key"] = attach_dim_key(fire_c, dims_other.get("dim_fire_class_group"), "INCIDENT_CLASSIFICATION_GROUP", "fire_class_group_key")
-    fact["fire_class_key"] = attach_dim_key(fire_c, dims_other.get("dim_fire_class"), "INCIDENT_CLASSIFICATION", "fire_class_key")
-    fact["fire_alarm_source_key"] = attach_dim_key(fire_c, dims_other.get("dim_fire_alarm_source"), "ALARM_SOURCE_DESCRIPTION_TX", "fire_alarm_source_key")
-    fact["fire_alarm_level_key"] = attach_dim_key(fire_c, dims_other.get("dim_fire_alarm_level"), "ALARM_LEVEL_INDEX_DESCRIPTION", "fire_alarm_level_key")
+    fact = fact.assign(**{
+        key_col: attach_dim_key(fire_c, dims_other.get(dim_name), col, key_col)
+        for col, dim_name, key_col in SMALL_DIMS_FIRE
+    })
 
     for c in ["ALARM_BOX_NUMBER", "ALARM_BOX_LOCATION", "ALARM_BOX_BOROUGH", "HIGHEST_ALARM_LEVEL"]:
         if c in fire_c.columns:
@@ -489,16 +689,27 @@ def main():
 
     ems_c, fire_c = make_staging(ems, fire)
 
-    dim_time = build_dim_time(ems_c, fire_c, list(set(DT_COLS_COMMON + DT_COLS_EMS_EXTRA)))
-    dim_location = build_dim_location(ems_c, fire_c)
-    dim_firehouse = build_dim_firehouse(fire_stations)
-    
-    bridge_zip_firehouse = build_bridge_zip_firehouse(dim_firehouse)
-    
-    dims_other = build_small_dims(ems_c, fire_c)
+    # Dims are independent of each other and facts only need the dims; threads share
+    # the staging frames without pickling, and the heavy work releases the GIL.
+    n_workers = 4 if len(ems_c) + len(fire_c) >= PARALLEL_MIN_ROWS else 1
+    with ThreadPoolExecutor(max_workers=n_workers) as ex:
+        f_time = ex.submit(build_dim_time, ems_c, fire_c, list(set(DT_COLS_COMMON + DT_COLS_EMS_EXTRA)))
+        f_location = ex.submit(build_dim_location, ems_c, fire_c)
+        f_firehouse = ex.submit(build_dim_firehouse, fire_stations)
+        f_small = ex.submit(build_small_dims, ems_c, fire_c)
+
+        dim_location = f_location.result()
+        dims_other = f_small.result()
+
+        f_fact_ems = ex.submit(build_fact_ems, ems_c, dim_location, dims_other)
+        f_fact_fire = ex.submit(build_fact_fire, fire_c, dim_location, dims_other)
+
+        dim_time = f_time.result()
+        dim_firehouse = f_firehouse.result()
+        bridge_zip_firehouse = build_bridge_zip_firehouse(dim_firehouse)
 
-    fact_ems = build_fact_ems(ems_c, dim_location, dims_other)
-    fact_fire = build_fact_fire(fire_c, dim_location, dims_other)
+        fact_ems = f_fact_ems.result()
+        fact_fire = f_fact_fire.result()
 
     print("Exporting to Parquet...")
     
@@ -514,7 +725,13 @@ def main():
 
     for name, df in tables.items():
         print(f"  Saving {name}.parquet...")
-        df.to_parquet(OUTPUT_DIR / f"{name}.parquet", index=False)
+        pq.write_table(
+            pa.Table.from_pandas(df, preserve_index=False),
+            OUTPUT_DIR / f"{name}.parquet",
+            compression="zstd",
+            use_dictionary=True,
+            row_group_size=PARQUET_ROW_GROUP_SIZE,
+        )
         
     print("Done! All files saved to powerbi_parquet/")
 
@@ -1,6 +1,8 @@
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
 import warnings
 import os
@@ -12,16 +14,98 @@ warnings.filterwarnings('ignore')
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 DATA_RAW = PROJECT_ROOT / "data" / "raw"
 OUTPUT_DIR = PROJECT_ROOT / "data" / "processed" / "galaxy_schema"
+# Analysis-only artefacts, kept out of the folder Power BI imports
+ANALYSIS_CACHE_DIR = PROJECT_ROOT / "data" / "processed" / "analysis_cache"
 
 DT_COLS_EMS = ["INCIDENT_DATETIME", "FIRST_ASSIGNMENT_DATETIME", "FIRST_ON_SCENE_DATETIME"]
 DT_COLS_FIRE = ["INCIDENT_DATETIME"]
 
 MEASURE_COLS_EMS = ["DISPATCH_RESPONSE_SECONDS_QY", "INCIDENT_RESPONSE_SECONDS_QY", "INCIDENT_TRAVEL_TM_SECONDS_QY"]
 MEASURE_COLS_FIRE = ["TOTAL_INCIDENT_DURATION_SECONDS"]
+UNIT_COLS_FIRE = ["ENGINES_ASSIGNED_QUANTITY", "LADDERS_ASSIGNED_QUANTITY", "OTHER_UNITS_ASSIGNED_QUANTITY"]
+
+# Only the raw columns the dimension and fact builders read are loaded
+EMS_USECOLS = ["CAD_INCIDENT_ID", "INCIDENT_DATETIME", "ZIPCODE", "BOROUGH", "INITIAL_CALL_TYPE", "FINAL_CALL_TYPE", *MEASURE_COLS_EMS]
+FIRE_USECOLS = ["STARFIRE_INCIDENT_ID", "INCIDENT_DATETIME", "ZIPCODE", "INCIDENT_BOROUGH", "INCIDENT_CLASSIFICATION",
+                "INCIDENT_CLASSIFICATION_GROUP", *MEASURE_COLS_EMS, *MEASURE_COLS_FIRE, *UNIT_COLS_FIRE]
+CSV_DTYPES = {
+    "INCIDENT_DATETIME": "string",
+    "ZIPCODE": "string",
+    "BOROUGH": "category",
+    "INCIDENT_BOROUGH": "category",
+}
+CSV_CHUNK_ROWS = 1_000_000
+# Source columns of each dimension, collected as distinct rows while streaming the CSVs
+DIM_COLS_EMS = {
+    "time": ["INCIDENT_DATETIME"],
+    "location": ["ZIPCODE", "BOROUGH"],
+    "type": ["FINAL_CALL_TYPE"],
+}
+DIM_COLS_FIRE = {
+    "time": ["INCIDENT_DATETIME"],
+    "location": ["ZIPCODE", "INCIDENT_BOROUGH"],
+    "type": ["INCIDENT_CLASSIFICATION", "INCIDENT_CLASSIFICATION_GROUP"],
+}
+# Indexed by month number; slot 0 catches missing dates
+SEASON_BY_MONTH = np.array(["Unknown"] + ["Winter"] * 2 + ["Spring"] * 3 + ["Summer"] * 3 + ["Fall"] * 3 + ["Winter"], dtype=object)
+KP_COLS = {
+    "DISPATCH_RESPONSE_SECONDS_QY": "dispatch_time",
+    "INCIDENT_TRAVEL_TM_SECONDS_QY": "travel_time",
+    "INCIDENT_RESPONSE_SECONDS_QY": "response_time",
+}
+# How each source's raw columns map onto its fact table; keys double as Dim_IncidentType sources
+FACT_SPECS = {
+    "EMS": {
+        "file": "EMS.csv",
+        "usecols": EMS_USECOLS,
+        "id_col": "CAD_INCIDENT_ID",
+        "borough_col": "BOROUGH",
+        "type_col": "FINAL_CALL_TYPE",
+        "unit_cols": None,
+        "measures": KP_COLS,
+        "attributes": {"INITIAL_CALL_TYPE": "initial_call_type", "FINAL_CALL_TYPE": "final_call_type"},
+    },
+    "FIRE": {
+        "file": "FIRE.csv",
+        "usecols": FIRE_USECOLS,
+        "id_col": "STARFIRE_INCIDENT_ID",
+        "borough_col": "INCIDENT_BOROUGH",
+        "type_col": "INCIDENT_CLASSIFICATION",
+        "unit_cols": UNIT_COLS_FIRE,
+        "measures": {**KP_COLS, "TOTAL_INCIDENT_DURATION_SECONDS": "total_duration"},
+        "attributes": {},
+    },
+}
+
+COMBINED_SOURCES = ["EMS", "Fire"]
+COMBINED_SCHEMA = pa.schema([
+    ("date_key", pa.int32()),
+    ("hour", pa.int8()),
+    ("nb_interventions", pa.int32()),
+    ("incident_type_key", pa.int32()),
+    ("weather_key", pa.int32()),
+    ("travel_time", pa.float32()),
+    ("dispatch_time", pa.float32()),
+])
+# Arrow types of the EMS/FIRE fact columns; other columns keep the type inferred from pandas
+FACT_TYPES = {
+    "date_key": pa.int32(),
+    "hour": pa.int8(),
+    "location_key": pa.int32(),
+    "incident_type_key": pa.int32(),
+    "weather_key": pa.int32(),
+    "dispatch_time": pa.float32(),
+    "travel_time": pa.float32(),
+    "response_time": pa.float32(),
+    "total_duration": pa.float32(),
+    "nb_interventions": pa.int32(),
+}
+PARQUET_ZSTD_LEVEL = 3
 
 def norm_text(s: pd.Series) -> pd.Series:
     """
     Normalize text series by stripping whitespace and converting to uppercase.
+    Uses Arrow-backed strings so strip/upper run as vectorized Arrow kernels.
 
     Args:
         s (pd.Series): Input text series.
@@ -29,11 +113,12 @@ def norm_text(s: pd.Series) -> pd.Series:
     Returns:
         pd.Series: Normalized text series.
     """
-    return s.astype("string").str.strip().str.upper()
+    return s.astype("string[pyarrow]").str.strip().str.upper()
 
 def norm_borough(s: pd.Series) -> pd.Series:
     """
     Normalize borough names, standardizing variations of Staten Island.
+    Only the handful of distinct raw names is normalized, then gathered back to every row.
 
     Args:
         s (pd.Series): Input borough series.
@@ -41,16 +126,18 @@ def norm_borough(s: pd.Series) -> pd.Series:
     Returns:
         pd.Series: Normalized borough series.
     """
-    x = norm_text(s)
-    return x.replace({
+    codes, uniques = pd.factorize(s, sort=False)
+    x = norm_text(pd.Series(uniques)).replace({
         "RICHMOND / STATEN ISLAND": "STATEN ISLAND",
         "RICHMOND": "STATEN ISLAND",
         "STATEN ISLAND": "STATEN ISLAND",
     })
+    return pd.Series(x.array.take(codes, allow_fill=True), index=s.index, name=s.name)
 
 def parse_dt(s: pd.Series) -> pd.Series:
     """
     Parse datetime series with specific formatting.
+    Timestamps repeat heavily, so only the unique strings are parsed, then gathered back to every row.
 
     Args:
         s (pd.Series): Input datetime string series.
@@ -58,7 +145,47 @@ def parse_dt(s: pd.Series) -> pd.Series:
     Returns:
         pd.Series: Parsed datetime series.
     """
-    return pd.to_datetime(s, format="%m/%d/%Y %I:%M:%S %p", errors="coerce")
+    codes, uniques = pd.factorize(s, sort=False)
+    parsed = pd.to_datetime(pd.Series(uniques), format="%m/%d/%Y %I:%M:%S %p", errors="coerce")
+    return pd.Series(parsed.array.take(codes, allow_fill=True), index=s.index, name=s.name)
+
+def split_ymd(d: np.ndarray) -> tuple:
+    """
+    Split a datetime64 array into year, month and day integer arrays.
+
+    Args:
+        d (np.ndarray): Input datetime64 array.
+
+    Returns:
+        tuple: (year, month, day) int32 arrays.
+    """
+    days = d.astype("datetime64[D]")
+    months = days.astype("datetime64[M]")
+    years = days.astype("datetime64[Y]")
+    y = years.astype("int32") + 1970
+    m = (months - years).astype("int32") + 1
+    day = (days - months).astype("int32") + 1
+    return y, m, day
+
+def date_key_hour(dt: pd.Series) -> tuple:
+    """
+    Compute the YYYYMMDD date key and the hour of day straight from the datetime64 buffer.
+
+    Args:
+        dt (pd.Series): Input datetime series.
+
+    Returns:
+        tuple: (date_key Int32 series, hour Int8 series), NA where the datetime is missing.
+    """
+    values = dt.to_numpy(dtype="datetime64[ns]")
+    missing = np.isnat(values)
+    y, m, d = split_ymd(values)
+    key = y * 10000 + m * 100 + d
+    hour = ((values - values.astype("datetime64[D]")) // np.timedelta64(1, "h")).astype("int8")
+    return (
+        pd.Series(pd.arrays.IntegerArray(key, missing), index=dt.index),
+        pd.Series(pd.arrays.IntegerArray(hour, missing), index=dt.index),
+    )
 
 def get_fiscal_year(date: pd.Series) -> pd.Series:
     """
@@ -71,7 +198,7 @@ def get_fiscal_year(date: pd.Series) -> pd.Series:
     Returns:
         pd.Series: Fiscal year.
     """
-    return np.where(date.dt.month >= 7, date.dt.year + 1, date.dt.year)
+    return date.dt.year.to_numpy() + (date.dt.month.to_numpy() >= 7)
 
 def get_season(date: pd.Series) -> pd.Series:
     """
@@ -83,30 +210,57 @@ def get_season(date: pd.Series) -> pd.Series:
     Returns:
         pd.Series: Season name (Winter, Spring, Summer, Fall).
     """
-    month = date.dt.month
-    conditions = [
-        (month.isin([12, 1, 2])),
-        (month.isin([3, 4, 5])),
-        (month.isin([6, 7, 8])),
-        (month.isin([9, 10, 11]))
-    ]
-    choices = ['Winter', 'Spring', 'Summer', 'Fall']
-    return pd.Series(np.select(conditions, choices, default='Unknown'), index=date.index)
+    month = date.dt.month.fillna(0).to_numpy(dtype="int64")
+    return pd.Series(SEASON_BY_MONTH[month], index=date.index)
+
+def read_chunks(path, usecols):
+    """
+    Stream a raw CSV in chunks of CSV_CHUNK_ROWS rows.
+
+    Args:
+        path (Path): CSV file path.
+        usecols (list): Columns to keep; columns missing from the file are skipped.
+
+    Returns:
+        Iterator[pd.DataFrame]: Chunks of the CSV.
+    """
+    return pd.read_csv(path, usecols=lambda c: c in usecols, dtype=CSV_DTYPES, engine="c", chunksize=CSV_CHUNK_ROWS)
+
+def distinct_rows(path, groups):
+    """
+    Stream a raw CSV once and collect the distinct rows of each group of columns.
+
+    Args:
+        path (Path): CSV file path.
+        groups (dict): Group name -> list of columns.
+
+    Returns:
+        tuple: (dict of group name -> pd.DataFrame of distinct rows, number of rows read).
+    """
+    parts = {name: [] for name in groups}
+    n_rows = 0
+    for chunk in read_chunks(path, [c for cols in groups.values() for c in cols]):
+        n_rows += len(chunk)
+        for name, cols in groups.items():
+            parts[name].append(chunk[[c for c in cols if c in chunk.columns]].drop_duplicates())
+    distinct = {name: pd.concat(p, ignore_index=True).drop_duplicates(ignore_index=True) for name, p in parts.items()}
+    return distinct, n_rows
 
 def load_data():
     """
-    Load raw CSV data for EMS, Fire, and Firehouse datasets.
+    First pass over the raw data: distinct dimension source rows of EMS and FIRE, and the Firehouse table.
 
     Returns:
-        tuple: (ems, fire, firehouse) pandas DataFrames, or (None, None, None) on failure.
+        tuple: (ems_keys, fire_keys, firehouse) where the keys are dicts of DataFrames keyed like
+        DIM_COLS_EMS / DIM_COLS_FIRE, or (None, None, None) on failure.
     """
     print("Loading Raw Data...")
     try:
-        ems = pd.read_csv(DATA_RAW / 'EMS.csv', low_memory=False)
-        fire = pd.read_csv(DATA_RAW / 'FIRE.csv', low_memory=False)
+        ems_keys, n_ems = distinct_rows(DATA_RAW / 'EMS.csv', DIM_COLS_EMS)
+        fire_keys, n_fire = distinct_rows(DATA_RAW / 'FIRE.csv', DIM_COLS_FIRE)
         firehouse = pd.read_csv(DATA_RAW / 'Firehouse.csv')
-        print(f"Loaded: EMS ({len(ems)}), FIRE ({len(fire)}), Firehouse ({len(firehouse)})")
-        return ems, fire, firehouse
+        print(f"Loaded: EMS ({n_ems}), FIRE ({n_fire}), Firehouse ({len(firehouse)})")
+        return ems_keys, fire_keys, firehouse
     except Exception as e:
         print(f"Error loading data: {e}")
         return None, None, None
@@ -129,7 +283,7 @@ def build_dim_time(ems, fire):
     all_dates = pd.concat([dts_ems, dts_fire]).dropna().dt.floor("D").drop_duplicates().sort_values()
     
     dim = pd.DataFrame({"date": all_dates})
-    dim["date_key"] = (dim["date"].dt.year * 10000 + dim["date"].dt.month * 100 + dim["date"].dt.day).astype("int32")
+    dim["date_key"] = date_key_hour(dim["date"])[0].astype("int32")
     dim["year"] = dim["date"].dt.year.astype("int16")
     dim["month"] = dim["date"].dt.month.astype("int8")
     dim["day"] = dim["date"].dt.day.astype("int8")
@@ -241,8 +395,9 @@ def build_dim_weather(weather_df):
     print("Building Dim_Weather...")
     w = weather_df.copy()
     w["dt"] = pd.to_datetime(w["time"])
-    w["date_key"] = (w["dt"].dt.year * 10000 + w["dt"].dt.month * 100 + w["dt"].dt.day).astype("int32")
-    w["hour"] = w["dt"].dt.hour.astype("int8")
+    date_key, hour = date_key_hour(w["dt"])
+    w["date_key"] = date_key.astype("int32")
+    w["hour"] = hour.astype("int8")
     
     w.rename(columns={
         "temperature_2m": "temp_f",
@@ -261,124 +416,179 @@ def build_dim_weather(weather_df):
     cols = ["weather_key", "date_key", "hour", "temp_f", "precip_in", "wind_mph", "weather_code", "is_raining", "is_hot", "is_cold"]
     return w[cols]
 
-def build_facts(ems, fire, dim_time, dim_location, dim_type, dim_weather):
+def lookup_key(keys, dim, on, key_col):
     """
-    Build Fact tables for EMS and FIRE incidents.
+    Look up a dimension surrogate key for every row by position in the dimension's natural-key index,
+    instead of hash-joining the whole fact frame against the dimension.
 
     Args:
-        ems (pd.DataFrame): Raw EMS data.
-        fire (pd.DataFrame): Raw FIRE data.
-        dim_time (pd.DataFrame): Dimension Time.
+        keys (pd.DataFrame): Natural-key columns of the fact rows, in the order of `on`.
+        dim (pd.DataFrame): Dimension table, unique on `on`.
+        on (list): Natural-key columns of the dimension.
+        key_col (str): Surrogate key column of the dimension.
+
+    Returns:
+        pd.Series: Int32 surrogate keys, NA where the row has no match.
+    """
+    pos = pd.MultiIndex.from_frame(dim[on]).get_indexer(pd.MultiIndex.from_frame(keys))
+    out = pd.array(dim[key_col].to_numpy(), dtype="Int32").take(pos, allow_fill=True)
+    return pd.Series(out, index=keys.index)
+
+def build_fact(df, source, dim_location, dim_type, dim_weather):
+    """
+    Build the Fact table for a chunk of raw EMS or FIRE rows, as described by FACT_SPECS[source].
+
+    Args:
+        df (pd.DataFrame): Raw EMS or FIRE data.
+        source (str): "EMS" or "FIRE".
         dim_location (pd.DataFrame): Dimension Location.
         dim_type (pd.DataFrame): Dimension Incident Type.
         dim_weather (pd.DataFrame): Dimension Weather.
 
     Returns:
-        tuple: (fact_ems_out, fact_fire_out) pandas DataFrames.
+        pd.DataFrame: Fact rows.
     """
-    print("Building Facts...")
-    
-    weather_lookup = dim_weather[["date_key", "hour", "weather_key"]]
+    spec = FACT_SPECS[source]
+    weather_lookup = dim_weather.drop_duplicates(["date_key", "hour"])
+    
+    date_key, hour = date_key_hour(parse_dt(df["INCIDENT_DATETIME"]))
+    zipcode_num = pd.to_numeric(df["ZIPCODE"], errors='coerce').astype("Int64")
+    borough_n = norm_borough(df[spec["borough_col"]])
+    
+    out = {
+        "incident_id": df[spec["id_col"]],
+        "date_key": date_key,
+        "hour": hour,
+        "location_key": lookup_key(pd.DataFrame({"zipcode": zipcode_num, "borough": borough_n}),
+                                   dim_location, ["zipcode", "borough"], "location_key"),
+        "incident_type_key": lookup_key(df[[spec["type_col"]]], dim_type[dim_type["source"]==source],
+                                        ["type_code"], "incident_type_key"),
+        "weather_key": lookup_key(pd.DataFrame({"date_key": date_key, "hour": hour}),
+                                  weather_lookup, ["date_key", "hour"], "weather_key"),
+    }
     
-    print("  Processing EMS...")
-    f_ems = ems.copy()
+    if spec["unit_cols"] is not None:
+        unit_cols = [c for c in spec["unit_cols"] if c in df.columns]
+        units = df[unit_cols].apply(pd.to_numeric, errors="coerce").to_numpy(dtype="float64", na_value=0).astype("int16")
+        for i, c in enumerate(unit_cols):
+            out[c.lower()] = units[:, i]
+        out["total_units"] = units.sum(axis=1, dtype="int16")
     
-    f_ems["dt"] = parse_dt(f_ems["INCIDENT_DATETIME"])
-    f_ems["date_key"] = (f_ems["dt"].dt.year * 10000 + f_ems["dt"].dt.month * 100 + f_ems["dt"].dt.day).astype("Int32")
-    f_ems["hour"] = f_ems["dt"].dt.hour.astype("Int8")
+    for old, new in spec["measures"].items():
+        if old in df.columns:
+            out[new] = pd.to_numeric(df[old], errors='coerce')
     
-    f_ems["zipcode_num"] = pd.to_numeric(f_ems["ZIPCODE"], errors='coerce').astype("Int64")
-    f_ems["borough_n"] = norm_borough(f_ems["BOROUGH"])
+    out["nb_interventions"] = 1
     
-    f_ems = f_ems.merge(dim_location, left_on=["zipcode_num", "borough_n"], right_on=["zipcode", "borough"], how="left")
-    f_ems.rename(columns={"location_key": "location_key_fk"}, inplace=True)
+    for old, new in spec["attributes"].items():
+        if old in df.columns:
+            out[new] = df[old]
     
-    f_ems = f_ems.merge(dim_type[dim_type["source"]=="EMS"], left_on="FINAL_CALL_TYPE", right_on="type_code", how="left")
+    return pd.DataFrame(out, index=df.index, copy=False)
+
+def build_facts(dim_location, dim_type, dim_weather):
+    """
+    Second pass over the raw data: build Fact tables for EMS and FIRE incidents chunk by chunk,
+    so only one raw chunk is held in memory at a time, then concatenate the partitions once.
+
+    Args:
+        dim_location (pd.DataFrame): Dimension Location.
+        dim_type (pd.DataFrame): Dimension Incident Type.
+        dim_weather (pd.DataFrame): Dimension Weather.
+
+    Returns:
+        tuple: (fact_ems_out, fact_fire_out) pandas DataFrames.
+    """
+    print("Building Facts...")
     
-    f_ems = f_ems.merge(weather_lookup, on=["date_key", "hour"], how="left")
+    facts = []
+    for source, spec in FACT_SPECS.items():
+        print(f"  Processing {source}...")
+        chunks = read_chunks(DATA_RAW / spec["file"], spec["usecols"])
+        parts = [build_fact(chunk, source, dim_location, dim_type, dim_weather) for chunk in chunks]
+        facts.append(pd.concat(parts, ignore_index=True))
     
-    fact_ems_out = pd.DataFrame()
-    fact_ems_out["incident_id"] = f_ems["CAD_INCIDENT_ID"]
-    fact_ems_out["date_key"] = f_ems["date_key"]
-    fact_ems_out["hour"] = f_ems["hour"]
-    fact_ems_out["location_key"] = f_ems["location_key_fk"]
-    fact_ems_out["incident_type_key"] = f_ems["incident_type_key"]
-    fact_ems_out["weather_key"] = f_ems["weather_key"].astype("Int32")
+    return tuple(facts)
+
+def build_fact_combined(fact_ems, fact_fire, dim_type, dim_weather):
+    """
+    Build a denormalized fact table stacking EMS and FIRE incidents with their category and temperature.
+
+    Incident categories and temperatures are looked up through arrays indexed by incident_type_key and 
+    weather_key, so the analyses can read them directly instead of joining the dimensions again.
+
+    Args:
+        fact_ems (pd.DataFrame): EMS fact table.
+        fact_fire (pd.DataFrame): FIRE fact table.
+        dim_type (pd.DataFrame): Dimension Incident Type.
+        dim_weather (pd.DataFrame): Dimension Weather.
+
+    Returns:
+        pa.Table: COMBINED_SCHEMA columns plus dictionary-encoded 'category' and 'Source' and 'temp_f'.
+    """
+    print("Building Fact_Incidents_Combined...")
+    
+    type_keys = dim_type["incident_type_key"].to_numpy(dtype="int64")
+    category_codes, categories = pd.factorize(dim_type["category"])
+    category_lut = np.full(type_keys.max(initial=0) + 2, -1, dtype="int16")
+    category_lut[type_keys] = category_codes
+    
+    weather_keys = dim_weather["weather_key"].to_numpy(dtype="int64")
+    temp_lut = np.full(weather_keys.max(initial=0) + 2, np.nan)
+    temp_lut[weather_keys] = dim_weather["temp_f"].to_numpy(dtype="float64", na_value=np.nan)
+    
+    category_dict = pa.array(categories.astype(str))
+    source_dict = pa.array(COMBINED_SOURCES)
+    tables = []
+    for i, fact in enumerate([fact_ems, fact_fire]):
+        table = pa.Table.from_pandas(fact[COMBINED_SCHEMA.names], preserve_index=False).cast(COMBINED_SCHEMA, safe=False)
+        
+        codes = category_lut[fact["incident_type_key"].to_numpy(dtype="int64", na_value=-1)]
+        table = table.append_column("category", pa.DictionaryArray.from_arrays(pa.array(codes, mask=codes < 0), category_dict))
+        
+        temps = temp_lut[fact["weather_key"].to_numpy(dtype="int64", na_value=-1)]
+        table = table.append_column("temp_f", pa.array(temps, from_pandas=True))
+        
+        source_codes = pa.array(np.full(len(table), i, dtype="int8"))
+        tables.append(table.append_column("Source", pa.DictionaryArray.from_arrays(source_codes, source_dict)))
     
-    kp_cols = {
-        "DISPATCH_RESPONSE_SECONDS_QY": "dispatch_time",
-        "INCIDENT_TRAVEL_TM_SECONDS_QY": "travel_time",
-        "INCIDENT_RESPONSE_SECONDS_QY": "response_time"
-    }
-    for old, new in kp_cols.items():
-        if old in f_ems.columns:
-            fact_ems_out[new] = pd.to_numeric(f_ems[old], errors='coerce')
-            
-    fact_ems_out["nb_interventions"] = 1
-    
-    if "INITIAL_CALL_TYPE" in f_ems.columns:
-        fact_ems_out["initial_call_type"] = f_ems["INITIAL_CALL_TYPE"]
-    if "FINAL_CALL_TYPE" in f_ems.columns:
-        fact_ems_out["final_call_type"] = f_ems["FINAL_CALL_TYPE"]
-    
-    print("  Processing FIRE...")
-    f_fire = fire.copy()
-    
-    f_fire["dt"] = parse_dt(f_fire["INCIDENT_DATETIME"])
-    f_fire["date_key"] = (f_fire["dt"].dt.year * 10000 + f_fire["dt"].dt.month * 100 + f_fire["dt"].dt.day).astype("Int32")
-    f_fire["hour"] = f_fire["dt"].dt.hour.astype("Int8")
-    
-    f_fire["zipcode_num"] = pd.to_numeric(f_fire["ZIPCODE"], errors='coerce').astype("Int64")
-    f_fire["borough_n"] = norm_borough(f_fire["INCIDENT_BOROUGH"])
-    
-    f_fire = f_fire.merge(dim_location, left_on=["zipcode_num", "borough_n"], right_on=["zipcode", "borough"], how="left")
-    f_fire.rename(columns={"location_key": "location_key_fk"}, inplace=True)
-    
-    f_fire = f_fire.merge(dim_type[dim_type["source"]=="FIRE"], left_on="INCIDENT_CLASSIFICATION", right_on="type_code", how="left")
-
-    f_fire = f_fire.merge(weather_lookup, on=["date_key", "hour"], how="left")
-
-    fact_fire_out = pd.DataFrame()
-    fact_fire_out["incident_id"] = f_fire["STARFIRE_INCIDENT_ID"]
-    fact_fire_out["date_key"] = f_fire["date_key"]
-    fact_fire_out["hour"] = f_fire["hour"]
-    fact_fire_out["location_key"] = f_fire["location_key_fk"]
-    fact_fire_out["incident_type_key"] = f_fire["incident_type_key"]
-    fact_fire_out["weather_key"] = f_fire["weather_key"].astype("Int32")
-    
-    for c in ["ENGINES_ASSIGNED_QUANTITY", "LADDERS_ASSIGNED_QUANTITY", "OTHER_UNITS_ASSIGNED_QUANTITY"]:
-        if c in f_fire.columns:
-            fact_fire_out[c.lower()] = pd.to_numeric(f_fire[c], errors="coerce").fillna(0).astype("int16")
-            
-    fact_fire_out["total_units"] = (fact_fire_out["engines_assigned_quantity"] + 
-                                    fact_fire_out["ladders_assigned_quantity"] + 
-                                    fact_fire_out["other_units_assigned_quantity"])
-            
-    for old, new in kp_cols.items():
-        if old in f_fire.columns:
-            fact_fire_out[new] = pd.to_numeric(f_fire[old], errors='coerce')
-
-    if "TOTAL_INCIDENT_DURATION_SECONDS" in f_fire.columns:
-         fact_fire_out["total_duration"] = pd.to_numeric(f_fire["TOTAL_INCIDENT_DURATION_SECONDS"], errors="coerce")
-         
-    fact_fire_out["nb_interventions"] = 1
-    
-    return fact_ems_out, fact_fire_out
+    return pa.concat_tables(tables)
+
+def write_parquet(data, path, types=None):
+    """
+    Write a table to Parquet with an explicit Arrow schema, ZSTD compression and dictionary encoding.
+
+    Args:
+        data (pd.DataFrame | pa.Table): Table to write.
+        path (Path): Output file path.
+        types (dict): Optional column -> Arrow type overrides; the pandas metadata is kept so
+            nullable integer columns read back as such.
+
+    Returns:
+        None
+    """
+    table = data if isinstance(data, pa.Table) else pa.Table.from_pandas(data, preserve_index=False)
+    if types:
+        schema = pa.schema([pa.field(f.name, types.get(f.name, f.type)) for f in table.schema], metadata=table.schema.metadata)
+        table = table.cast(schema)
+    pq.write_table(table, path, compression="zstd", compression_level=PARQUET_ZSTD_LEVEL,
+                   use_dictionary=True, write_statistics=True)
 
 def main():
     """
     Main ETL execution flow for Galaxy Schema:
-    1. Load Data
+    1. Load Data (distinct dimension source rows, streamed)
     2. Build Dimension Weather
     3. Build Dimension Time, Location, Firehouse, IncidentType
-    4. Build Facts (EMS and FIRE)
+    4. Build Facts (EMS and FIRE, streamed again) and the denormalized combined fact
     5. Export to Parquet
     """
     print("Starting Galaxy ETL...")
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    ANALYSIS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
     
-    ems, fire, firehouse = load_data()
-    if ems is None: return
+    ems_keys, fire_keys, firehouse = load_data()
+    if ems_keys is None: return
 
     weather_path = DATA_RAW / "weather_nyc.csv"
     if weather_path.exists():
@@ -388,24 +598,26 @@ def main():
         print("Warning: Weather data not found. Creating dummy Dim_Weather.")
         dim_weather = pd.DataFrame(columns=["weather_key", "date_key", "hour", "temp_f"])
 
-    dim_time = build_dim_time(ems, fire)
-    dim_location = build_dim_location(ems, fire)
+    dim_time = build_dim_time(ems_keys["time"], fire_keys["time"])
+    dim_location = build_dim_location(ems_keys["location"], fire_keys["location"])
     dim_firehouse = build_dim_firehouse(firehouse)
-    dim_type = build_dim_incident_type(ems, fire)
+    dim_type = build_dim_incident_type(ems_keys["type"], fire_keys["type"])
     
-    fact_ems, fact_fire = build_facts(ems, fire, dim_time, dim_location, dim_type, dim_weather)
+    fact_ems, fact_fire = build_facts(dim_location, dim_type, dim_weather)
+    fact_combined = build_fact_combined(fact_ems, fact_fire, dim_type, dim_weather)
     
     print("Exporting...")
-    dim_time.to_parquet(OUTPUT_DIR / "Dim_Time.parquet", index=False)
-    dim_location.to_parquet(OUTPUT_DIR / "Dim_Location.parquet", index=False)
-    dim_firehouse.to_parquet(OUTPUT_DIR / "Dim_Firehouse.parquet", index=False)
-    dim_type.to_parquet(OUTPUT_DIR / "Dim_IncidentType.parquet", index=False)
-    dim_weather.to_parquet(OUTPUT_DIR / "Dim_Weather.parquet", index=False)
+    write_parquet(dim_time, OUTPUT_DIR / "Dim_Time.parquet")
+    write_parquet(dim_location, OUTPUT_DIR / "Dim_Location.parquet")
+    write_parquet(dim_firehouse, OUTPUT_DIR / "Dim_Firehouse.parquet")
+    write_parquet(dim_type, OUTPUT_DIR / "Dim_IncidentType.parquet")
+    write_parquet(dim_weather, OUTPUT_DIR / "Dim_Weather.parquet")
     
-    fact_ems.to_parquet(OUTPUT_DIR / "Fact_Incidents_EMS.parquet", index=False)
-    fact_fire.to_parquet(OUTPUT_DIR / "Fact_Incidents_Fire.parquet", index=False)
+    write_parquet(fact_ems, OUTPUT_DIR / "Fact_Incidents_EMS.parquet", FACT_TYPES)
+    write_parquet(fact_fire, OUTPUT_DIR / "Fact_Incidents_Fire.parquet", FACT_TYPES)
+    write_parquet(fact_combined, ANALYSIS_CACHE_DIR / "Fact_Incidents_Combined.parquet")
     
-    print(f"Done. Files saved to {OUTPUT_DIR}")
+    print(f"Done. Files saved to {OUTPUT_DIR} (analysis cache in {ANALYSIS_CACHE_DIR})")
 
 if __name__ == "__main__":
     main()
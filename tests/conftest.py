@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The ETL scripts are run directly, not installed, so import them from their folder
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "etl"))
@@ -0,0 +1,46 @@
+import pandas as pd
+
+from etl_pipeline import DT_FORMAT, date_key_from_dt, parse_dt
+
+
+def reference(values):
+    return pd.to_datetime(pd.Series(values), format=DT_FORMAT, errors="coerce").astype("datetime64[ns]")
+
+
+def test_parse_dt_invalid_date_is_nat():
+    values = ["01/05/2020 01:02:03 PM", "02/30/2020 01:00:00 AM"]
+    result = parse_dt(pd.Series(values))
+    pd.testing.assert_series_equal(result, reference(values))
+    assert pd.isna(result[1])
+
+
+def test_parse_dt_unpadded_date():
+    values = ["1/5/2020 01:02:03 PM"]
+    result = parse_dt(pd.Series(values))
+    assert result[0] == pd.Timestamp("2020-01-05 13:02:03")
+
+
+def test_parse_dt_suspect_values_without_nulls():
+    values = ["1/5/2020 01:02:03 PM", "01/06/2020 11:00:00 AM", "1/5/2020 01:02:03 PM"]
+    result = parse_dt(pd.Series(values))
+    pd.testing.assert_series_equal(result, reference(values))
+
+
+def test_parse_dt_missing_values():
+    values = ["01/05/2020 01:02:03 PM", None, "garbage"]
+    result = parse_dt(pd.Series(values))
+    pd.testing.assert_series_equal(result, reference(values))
+
+
+def test_date_key_from_dt():
+    s = pd.Series(pd.to_datetime(["2021-03-04 10:00", None, "2020-12-31 23:59"]))
+    result = date_key_from_dt(s)
+    assert result.dtype == "Int32"
+    assert result.tolist() == [20210304, pd.NA, 20201231]
+
+
+def test_date_key_from_dt_all_missing():
+    s = pd.Series(pd.to_datetime([None, None]))
+    result = date_key_from_dt(s)
+    assert result.dtype == "Int32"
+    assert result.isna().all()